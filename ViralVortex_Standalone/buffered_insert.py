@@ -0,0 +1,49 @@
+import atexit
+import threading
+
+
+class BufferedInsert:
+    """
+    Buffers rows for one Supabase table and writes them as a single array
+    insert when `max_rows` are pending or every `interval` seconds, keeping
+    the HTTP round-trip out of the caller's critical path.
+    Pending rows are flushed at interpreter exit; flush() forces a write.
+    """
+
+    def __init__(self, supabase, table, max_rows=50, interval=5.0, max_pending=1000):
+        self.supabase = supabase
+        self.table = table
+        self.max_rows = max_rows
+        self.interval = interval
+        self.max_pending = max_pending
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, name=f"flush-{table}", daemon=True).start()
+        atexit.register(self.flush)
+
+    def add(self, row):
+        with self._lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.max_rows
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        try:
+            self.supabase.table(self.table).insert(rows).execute()
+        except Exception as e:
+            print(f"❌ Error flushing {len(rows)} row(s) to {self.table}: {e}")
+            with self._lock:
+                # Keep them for the next flush, dropping the oldest if the backlog grows too large
+                self._buffer = (rows + self._buffer)[-self.max_pending:]
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
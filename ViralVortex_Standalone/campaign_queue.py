@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import traceback
+
+
+class CampaignQueue:
+    """
+    Runs campaigns on a single background event loop instead of one OS thread
+    per request. A bounded asyncio.Queue gives back-pressure and a fixed pool of
+    worker coroutines bounds concurrency, so every campaign shares the same
+    AsyncOpenAI connection pool.
+    """
+
+    def __init__(self, engine, workers=8, maxsize=100):
+        self.engine = engine
+        self.workers = workers
+        self.maxsize = maxsize
+        self.loop = None
+        self._queue = None
+        self._ready = threading.Event()
+
+    def start(self):
+        """Starts the event loop in a daemon thread (idempotent)."""
+        if self.loop is not None:
+            return self
+        threading.Thread(target=self._run_loop, name="campaign-loop", daemon=True).start()
+        self._ready.wait()
+        return self
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        for _ in range(self.workers):
+            self.loop.create_task(self._worker())
+        self._ready.set()
+        self.loop.run_forever()
+
+    async def _worker(self):
+        while True:
+            params = await self._queue.get()
+            try:
+                await self.engine.run_campaign_async(**params)
+            except Exception:
+                print(f"❌ Campaign failed: {params.get('topic')}")
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    async def _enqueue(self, params):
+        try:
+            self._queue.put_nowait(params)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def submit(self, **params):
+        """Queues a campaign (run_campaign kwargs). Returns False when the queue is full."""
+        return self.run(self._enqueue(params))
+
+    def run(self, coro, timeout=None):
+        """Runs a coroutine on the background loop from sync code and waits for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
@@ -1,5 +1,8 @@
 import os
 import json
+import asyncio
+from openai import DefaultHttpxClient, DefaultAsyncHttpxClient
+import httpx
 from humanizer import Humanizer
 from stepps_evaluator import STEPPSEvaluator
 from persona_manager import PersonaManager
@@ -8,52 +11,136 @@ from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
 
+# STEPPS quality gate
+MIN_VIRALITY_SCORE = 7.0
+
+# One keep-alive pool shared by OpenAI and Supabase (avoids a TLS handshake per call)
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
 class ViralVortexEngine:
     """
     The main orchestrator for Viral Vortex.
     Coordinates Research, Perfection, and Autonomous Execution.
     """
     
-    def __init__(self):
-        self.humanizer = Humanizer()
-        self.evaluator = STEPPSEvaluator()
-        self.persona_manager = PersonaManager()
-        self.sentinel = Sentinel()
+    def __init__(self, max_concurrency=8):
+        # retries=1 re-attempts failed connects on the shared keep-alive pool
+        self.http_client = DefaultHttpxClient(transport=httpx.HTTPTransport(retries=1, limits=HTTP_LIMITS))
+        self.async_http_client = DefaultAsyncHttpxClient(limits=HTTP_LIMITS)
+        self.humanizer = Humanizer(http_client=self.http_client, async_http_client=self.async_http_client)
+        self.evaluator = STEPPSEvaluator(http_client=self.http_client, async_http_client=self.async_http_client)
+        self.persona_manager = PersonaManager(http_client=self.http_client)
+        self.sentinel = Sentinel(supabase=self.persona_manager.supabase)
+        # Bounds how many campaigns hit OpenAI at once when run via asyncio.gather
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def aclose(self):
+        """Releases the shared connection pools (call on shutdown, from the loop that used them)."""
+        # Buffered inserts still need the pool. Called inline: at interpreter
+        # exit no new executor threads can be started for asyncio.to_thread.
+        self.sentinel.flush()
+        self.persona_manager.flush()
+        await self.async_http_client.aclose()
+        self.http_client.close()
+
+    def _bind_async_http_client(self, async_http_client):
+        """Points every AsyncOpenAI client at `async_http_client` (httpx pools cannot move between loops)."""
+        self.async_http_client = async_http_client
+        for component in (self.humanizer, self.evaluator):
+            component.aclient = component.aclient.copy(http_client=async_http_client)
+            if component.cache:
+                component.cache.aclient = component.aclient
 
     def run_campaign(self, topic, persona_name=None, platform="reddit", community="r/test", is_pro=True, language="es"):
+        """
+        Blocking entry point for sync callers (scripts, Flask worker threads).
+        asyncio.run() starts a fresh loop, so the async pool is rebuilt inside it and
+        closed before the loop ends; the engine's sync pool stays open for later calls.
+        """
+        async def run():
+            previous = self.async_http_client
+            run_client = DefaultAsyncHttpxClient(limits=HTTP_LIMITS)
+            self._bind_async_http_client(run_client)
+            try:
+                return await self.run_campaign_async(
+                    topic,
+                    persona_name=persona_name,
+                    platform=platform,
+                    community=community,
+                    is_pro=is_pro,
+                    language=language
+                )
+            finally:
+                self._bind_async_http_client(previous)
+                await run_client.aclose()
+
+        return asyncio.run(run())
+
+    async def run_campaign_async(self, topic, persona_name=None, platform="reddit", community="r/test", is_pro=True, language="es"):
+        async with self._semaphore:
+            return await self._run_campaign(topic, persona_name, platform, community, is_pro, language)
+
+    async def _generate_content(self, topic, platform, language):
+        """Generate & Humanize (Perfection Layer), then Evaluate (Science Layer)."""
+        raw_content, human_content = await self.humanizer.agenerate_and_humanize(topic, platform, language=language)
+        rating = None
+        async for event, payload in self.evaluator.aevaluate_stream(human_content, min_score=MIN_VIRALITY_SCORE):
+            if event == "result":
+                rating = payload
+        return human_content, rating
+
+    async def _run_campaign(self, topic, persona_name, platform, community, is_pro, language):
         print(f"🚀 Starting Viral Campaign [PRO]: '{topic}' on {platform}/{community} [{language.upper()}]")
         
         # 1. Select Persona
-        personas = self.persona_manager.get_personas()
-        persona = next((p for p in personas if p['name'] == persona_name), personas[0])
+        persona = await asyncio.to_thread(self.persona_manager.get_by_name, persona_name)
         print(f"👤 Acting as: {persona['name']}")
         
-        # 2. Vibe Check (Sentinel)
-        is_safe, sentiment = self.sentinel.check_community_vibe(platform, community)
+        # 2. Kick off independent work: the video prompt depends only on the topic,
+        # and the vibe check is independent of content generation.
+        video_task = None
+        if is_pro:
+            from video_gen import VideoGenerator
+            vg = VideoGenerator()
+            video_task = asyncio.create_task(vg.agenerate_video(f"Viral clip for: {topic}"))
+        vibe_task = asyncio.create_task(asyncio.to_thread(self.sentinel.check_community_vibe, platform, community))
+        content_task = asyncio.create_task(self._generate_content(topic, platform, language))
+
+        try:
+            (is_safe, sentiment), (human_content, rating) = await asyncio.gather(vibe_task, content_task)
+        except BaseException:
+            for task in (vibe_task, content_task, video_task):
+                if task:
+                    task.cancel()
+            raise
+
+        # 3. Vibe Check (Sentinel)
         if not is_safe:
             print(f"🛑 ABORT: Community {community} is currently too toxic (Sentiment: {sentiment:.2f})")
+            if video_task:
+                video_task.cancel()
             return
-        
-        # 3. Generate & Humanize (Perfection Layer)
-        raw_content = self.humanizer.generate_viral_draft(topic, language=language)
-        human_content = self.humanizer.humanize(raw_content, platform, language=language)
-        
-        # 4. Evaluate (Science Layer)
-        rating = self.evaluator.evaluate(human_content)
+
+        # 4. Quality Gate (Science Layer)
         print(f"📊 Virality Score: {rating['total_score']}/10")
-        
-        if rating['total_score'] < 7.0:
+
+        if rating['total_score'] < MIN_VIRALITY_SCORE:
             print(f"⚠️ Content rejected by STEPPS Evaluator: {rating['feedback']}")
+            if video_task:
+                video_task.cancel()
             return
 
         # 5. Pro Feature: Wan 2.1 Video Generation
-        if is_pro:
-            from video_gen import VideoGenerator
-            vg = VideoGenerator()
-            video = vg.generate_video(f"Viral clip for: {topic}")
-            video_url = video['video_url'] # Assign video_url
+        video_url = None
+        if video_task:
+            video = await video_task
+            video_url = video.get('video_url')
             print(f"🎬 PRO: Attached Wan 2.1 Video -> {video_url}")
 
+        # 6-8. Execute, Record Memory, Post-Launch Sentinel
+        await asyncio.to_thread(self._publish, persona, human_content, rating, platform, community, video_url)
+
+    def _publish(self, persona, human_content, rating, platform, community, video_url=None):
         # 6. Execute (Mocked for safety)
         print(f"✅ EXECUTION: Posting to {community}...")
         print(f"\n--- CONTENT ---\n{human_content}\n---------------")
@@ -68,7 +155,7 @@ class ViralVortexEngine:
         )
         print(f"📌 Memory Synchronized. Video: {video_url}")
         
-        # 7. Post-Launch Sentinel
+        # 8. Post-Launch Sentinel
         time_to_wait = 1  # In production: 900 (15 min)
         visible = self.sentinel.verify_post_visibility("mock_id_123")
         if visible:
@@ -76,6 +163,68 @@ class ViralVortexEngine:
         else:
             print("❌ MISSION FAILED: Post deleted or hidden.")
 
+    def run_campaigns_batch(self, campaigns, poll_interval=60):
+        """
+        Offline path for latency-insensitive runs (e.g. the growth orchestrator).
+        Each stage (draft -> humanize -> evaluate) of all `campaigns` goes through
+        one OpenAI Batch API job. `campaigns` is a list of run_campaign kwargs;
+        the video step is skipped (text-only).
+        """
+        print(f"📦 Starting batched run for {len(campaigns)} campaign(s)")
+
+        pending = {}
+        for i, campaign in enumerate(campaigns):
+            platform = campaign.get('platform', 'reddit')
+            community = campaign.get('community', 'r/test')
+            is_safe, sentiment = self.sentinel.check_community_vibe(platform, community)
+            if not is_safe:
+                print(f"🛑 SKIP: Community {community} is currently too toxic (Sentiment: {sentiment:.2f})")
+                continue
+            pending[f"campaign-{i}"] = {
+                **campaign,
+                'platform': platform,
+                'community': community,
+                'language': campaign.get('language', 'es'),
+                'persona': self.persona_manager.get_by_name(campaign.get('persona_name'))
+            }
+        if not pending:
+            return
+
+        batch_id = self.humanizer.submit_batch([
+            self.humanizer.draft_request(cid, c['topic'], language=c['language'])
+            for cid, c in pending.items()
+        ])
+        drafts = self.humanizer.wait_for_batch(batch_id, poll_interval)
+        if not drafts:
+            print("❌ Batch returned no results, aborting run")
+            return
+
+        batch_id = self.humanizer.submit_batch([
+            self.humanizer.humanize_request(cid, drafts[cid], c['platform'], language=c['language'])
+            for cid, c in pending.items() if cid in drafts
+        ])
+        humanized = self.humanizer.wait_for_batch(batch_id, poll_interval)
+        if not humanized:
+            print("❌ Batch returned no results, aborting run")
+            return
+
+        batch_id = self.humanizer.submit_batch([
+            self.evaluator.batch_request(cid, humanized[cid])
+            for cid in pending if cid in humanized
+        ])
+        ratings = self.humanizer.wait_for_batch(batch_id, poll_interval)
+
+        for cid, c in pending.items():
+            if cid not in ratings:
+                print(f"⚠️ {c['community']}: batch request failed, skipping")
+                continue
+            rating = json.loads(ratings[cid])
+            print(f"📊 [{c['community']}] Virality Score: {rating['total_score']}/10")
+            if rating['total_score'] < MIN_VIRALITY_SCORE:
+                print(f"⚠️ Content rejected by STEPPS Evaluator: {rating['feedback']}")
+                continue
+            self._publish(c['persona'], humanized[cid], rating, c['platform'], c['community'])
+
 if __name__ == "__main__":
     engine = ViralVortexEngine()
     engine.run_campaign(
@@ -1,5 +1,45 @@
 import os
-from openai import OpenAI
+import json
+import time
+from openai import OpenAI, AsyncOpenAI
+from llm_cache import CachedLLM
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
+
+# Tunable without code changes. The rewrite pass is a narrow style transfer,
+# so it runs on the cheaper/faster mini model by default.
+DRAFT_MODEL = os.getenv("DRAFT_MODEL", "gpt-4o")
+HUMANIZER_MODEL = os.getenv("HUMANIZER_MODEL", "gpt-4o-mini")
+
+def _draft_system(language):
+    system_msg = "You are a master viral marketer. Use Jonah Berger's STEPPS framework."
+    if language == "es":
+        system_msg += " Generate the response in Spanish."
+    else:
+        system_msg += " Generate the response in English."
+    return system_msg
+
+def _humanize_system(language, platform):
+    lang_context = "Spanish-speaking" if language == "es" else "English-speaking"
+    return (
+        f"You are a regular {lang_context} {platform} user. "
+        "Your goal is to REWRITE the following text to look like a real human wrote it. "
+        "Rules: \n"
+        "1. Add 1-2 minor typos (character swaps).\n"
+        "2. Use platform-specific slang.\n"
+        "3. Vary sentence lengths.\n"
+        "4. Remove any 'AI' robotic tone.\n"
+        "5. Keep the core viral hooks intact."
+    )
+
+def _fused_system(language, platform):
+    return (
+        _draft_system(language) + "\n\n"
+        "Then act as the following user and rewrite your draft.\n"
+        + _humanize_system(language, platform) + "\n\n"
+        'Respond with a JSON object: {"draft": "<the polished post>", "humanized": "<the rewritten post>"}.'
+    )
 
 class Humanizer:
     """
@@ -7,53 +47,169 @@ class Humanizer:
     Layer 1: Content Generation (Perfect)
     Layer 2: Humanization (Adding 'imperfect' traits)
     """
-    
-    def __init__(self, api_key=None):
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+
+    # System prompts are built once so every call sends a byte-identical prefix
+    # (required for OpenAI's automatic prompt caching).
+    _DRAFT_SYSTEM = {lang: _draft_system(lang) for lang in ("es", "en")}
+    _HUMANIZE_SYSTEM = {
+        (lang, platform): _humanize_system(lang, platform)
+        for lang in ("es", "en")
+        for platform in ("reddit", "twitter")
+    }
+    _FUSED_SYSTEM = {
+        (lang, platform): _fused_system(lang, platform)
+        for lang in ("es", "en")
+        for platform in ("reddit", "twitter")
+    }
+
+    def __init__(self, api_key=None, use_cache=True, http_client=None, async_http_client=None):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = OpenAI(api_key=api_key, http_client=http_client)
+        self.aclient = AsyncOpenAI(api_key=api_key, http_client=async_http_client)
+        self.cache = CachedLLM(self.client, self.aclient) if use_cache else None
+
+    def _complete(self, namespace, model, messages, **kwargs):
+        def call():
+            response = self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+            return response.choices[0].message.content
+
+        if self.cache is None:
+            return call()
+        return self.cache.get_or_compute(namespace, model, messages, call)
+
+    async def _acomplete(self, namespace, model, messages, **kwargs):
+        async def call():
+            response = await self.aclient.chat.completions.create(model=model, messages=messages, **kwargs)
+            return response.choices[0].message.content
+
+        if self.cache is None:
+            return await call()
+        return await self.cache.aget_or_compute(namespace, model, messages, call)
+
+    def _draft_messages(self, topic, language="es"):
+        system_msg = self._DRAFT_SYSTEM.get(language) or _draft_system(language)
+        return [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": f"Generate a viral post about: {topic}"}
+        ]
+
+    def _humanize_messages(self, text, platform="reddit", language="es"):
+        system_msg = self._HUMANIZE_SYSTEM.get((language, platform))
+        if system_msg is None:
+            system_msg = self._HUMANIZE_SYSTEM[(language, platform)] = _humanize_system(language, platform)
+        return [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": text}
+        ]
+
+    def _fused_messages(self, topic, platform="reddit", language="es"):
+        system_msg = self._FUSED_SYSTEM.get((language, platform))
+        if system_msg is None:
+            system_msg = self._FUSED_SYSTEM[(language, platform)] = _fused_system(language, platform)
+        return [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": f"Generate a viral post about: {topic}"}
+        ]
 
     def generate_viral_draft(self, topic, language="es"):
         """Generates a high-quality viral post based on STEPPS."""
-        system_msg = "You are a master viral marketer. Use Jonah Berger's STEPPS framework."
-        if language == "es":
-            system_msg += " Generate the response in Spanish."
-        else:
-            system_msg += " Generate the response in English."
-
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": f"Generate a viral post about: {topic}"}
-            ]
-        )
-        return response.choices[0].message.content
+        return self._complete("draft", DRAFT_MODEL, self._draft_messages(topic, language))
+
+    async def agenerate_viral_draft(self, topic, language="es"):
+        """Async variant of generate_viral_draft (non-blocking I/O)."""
+        return await self._acomplete("draft", DRAFT_MODEL, self._draft_messages(topic, language))
 
     def humanize(self, text, platform="reddit", language="es"):
         """Adds human-mimicry: typos, slang, variadic sentence length."""
-        lang_context = "Spanish-speaking" if language == "es" else "English-speaking"
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": (
-                    f"You are a regular {lang_context} {platform} user. "
-                    "Your goal is to REWRITE the following text to look like a real human wrote it. "
-                    "Rules: \n"
-                    "1. Add 1-2 minor typos (character swaps).\n"
-                    "2. Use platform-specific slang.\n"
-                    "3. Vary sentence lengths.\n"
-                    "4. Remove any 'AI' robotic tone.\n"
-                    "5. Keep the core viral hooks intact."
-                )},
-                {"role": "user", "content": text}
-            ]
+        return self._complete("humanize", HUMANIZER_MODEL, self._humanize_messages(text, platform, language))
+
+    async def ahumanize(self, text, platform="reddit", language="es"):
+        """Async variant of humanize (non-blocking I/O)."""
+        return await self._acomplete("humanize", HUMANIZER_MODEL, self._humanize_messages(text, platform, language))
+
+    def generate_and_humanize(self, topic, platform="reddit", language="es"):
+        """
+        Draft + humanize in a single call (one round-trip instead of two).
+        Returns (draft, humanized).
+        """
+        raw = self._complete(
+            "draft_humanize", DRAFT_MODEL, self._fused_messages(topic, platform, language),
+            response_format={"type": "json_object"}
+        )
+        result = json.loads(raw)
+        return result["draft"], result["humanized"]
+
+    async def agenerate_and_humanize(self, topic, platform="reddit", language="es"):
+        """Async variant of generate_and_humanize (non-blocking I/O)."""
+        raw = await self._acomplete(
+            "draft_humanize", DRAFT_MODEL, self._fused_messages(topic, platform, language),
+            response_format={"type": "json_object"}
+        )
+        result = json.loads(raw)
+        return result["draft"], result["humanized"]
+
+    # --- OpenAI Batch API (offline runs: ~50% cheaper, outside the sync RPM pool) ---
+
+    def draft_request(self, custom_id, topic, language="es"):
+        """Batch JSONL line equivalent to generate_viral_draft."""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": DRAFT_MODEL, "messages": self._draft_messages(topic, language)}
+        }
+
+    def humanize_request(self, custom_id, text, platform="reddit", language="es"):
+        """Batch JSONL line equivalent to humanize."""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": HUMANIZER_MODEL, "messages": self._humanize_messages(text, platform, language)}
+        }
+
+    def submit_batch(self, requests):
+        """Uploads chat-completion requests as JSONL and starts a batch. Returns the batch id."""
+        payload = "\n".join(json.dumps(r) for r in requests).encode("utf-8")
+        batch_file = self.client.files.create(file=("vortex_batch.jsonl", payload), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
         )
-        return response.choices[0].message.content
+        return batch.id
+
+    def wait_for_batch(self, batch_id, poll_interval=60):
+        """
+        Polls until the batch finishes and returns {custom_id: message content}.
+        Requests that errored inside the batch are left out.
+        """
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status == "completed":
+                break
+            if batch.status in ("failed", "expired", "cancelled"):
+                raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}'")
+            time.sleep(poll_interval)
+
+        results = {}
+        if not batch.output_file_id:
+            return results
+        for line in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") != 200:
+                continue
+            results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
 
     def process(self, topic):
         print(f"--- Generating Draft for: {topic} ---")
         draft = self.generate_viral_draft(topic)
         print(f"Draft: {draft[:100]}...")
-        
+
         print("\n--- Humanizing ---")
         human_text = self.humanize(draft)
         return human_text
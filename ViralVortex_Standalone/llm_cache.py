@@ -0,0 +1,134 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '.vortex_cache')
+
+
+class CachedLLM:
+    """
+    Semantic response cache for chat completions.
+    Exact prompts are answered from an MD5 lookup; near-duplicates (cosine
+    similarity >= threshold on text-embedding-3-small vectors of the user
+    content) reuse the stored completion instead of calling the LLM again.
+    Near-duplicates are only searched among entries with the same namespace,
+    model and system prompt, so a shared instruction block cannot make two
+    unrelated requests look alike. Persisted to SQLite so the orchestrator
+    loop keeps its hits across restarts.
+    """
+
+    def __init__(self, client, aclient=None, path=None, threshold=0.97, embedding_model="text-embedding-3-small"):
+        self.client = client
+        self.aclient = aclient
+        self.threshold = threshold
+        self.embedding_model = embedding_model
+        self._lock = threading.Lock()
+
+        path = path or os.path.join(CACHE_DIR, 'llm_cache.sqlite')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, namespace TEXT, embedding BLOB, response TEXT)"
+        )
+        self._db.commit()
+
+        # partition -> (keys, L2-normalised embedding matrix); the partition
+        # string is what the namespace column stores
+        self._index = {}
+        for key, partition, blob in self._db.execute("SELECT key, namespace, embedding FROM llm_cache"):
+            self._append(partition, key, np.frombuffer(blob, dtype=np.float32))
+
+    @staticmethod
+    def _prompt_text(model, messages):
+        return model + "\n" + "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+    @staticmethod
+    def _partition(namespace, model, messages):
+        system = "\n".join(m['content'] for m in messages if m['role'] == 'system')
+        return f"{namespace}|{model}|{hashlib.md5(system.encode('utf-8')).hexdigest()}"
+
+    @staticmethod
+    def _user_text(messages):
+        return "\n".join(m['content'] for m in messages if m['role'] != 'system')
+
+    @staticmethod
+    def _normalise(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _append(self, partition, key, vector):
+        keys, matrix = self._index.get(partition, ([], np.empty((0, vector.shape[0]), dtype=np.float32)))
+        self._index[partition] = (keys + [key], np.vstack([matrix, vector]))
+
+    def _exact(self, key):
+        row = self._db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _nearest(self, partition, vector):
+        with self._lock:
+            keys, matrix = self._index.get(partition, ([], None))
+            if not keys:
+                return None
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            return self._exact(keys[best])
+
+    def _store(self, partition, key, vector, response):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, namespace, embedding, response) VALUES (?, ?, ?, ?)",
+                (key, partition, vector.tobytes(), response)
+            )
+            self._db.commit()
+            self._append(partition, key, vector)
+
+    def get_or_compute(self, namespace, model, messages, fn):
+        """
+        Returns the cached completion for (model, messages) or calls `fn()`
+        (which must return the completion text) and stores the result.
+        """
+        text = self._prompt_text(model, messages)
+        key = hashlib.md5(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._exact(key)
+        if cached is not None:
+            return cached
+
+        partition = self._partition(namespace, model, messages)
+        embedding = self.client.embeddings.create(model=self.embedding_model, input=self._user_text(messages))
+        vector = self._normalise(embedding.data[0].embedding)
+        cached = self._nearest(partition, vector)
+        if cached is not None:
+            return cached
+
+        response = fn()
+        self._store(partition, key, vector, response)
+        return response
+
+    async def aget_or_compute(self, namespace, model, messages, fn):
+        """
+        Async variant of get_or_compute; `fn` is a coroutine function.
+        """
+        text = self._prompt_text(model, messages)
+        key = hashlib.md5(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            cached = self._exact(key)
+        if cached is not None:
+            return cached
+
+        partition = self._partition(namespace, model, messages)
+        embedding = await self.aclient.embeddings.create(model=self.embedding_model, input=self._user_text(messages))
+        vector = self._normalise(embedding.data[0].embedding)
+        cached = self._nearest(partition, vector)
+        if cached is not None:
+            return cached
+
+        response = await fn()
+        self._store(partition, key, vector, response)
+        return response
@@ -1,11 +1,23 @@
 import os
-import time
+import sys
 import random
+import asyncio
 from engine import ViralVortexEngine
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
 
+BAITS_ES = [
+    "Analicé los 100 mejores posts de Reddit de 2026. La mayoría falla en 'Moneda Social'. Prueba esta herramienta gratis: {url}",
+    "Deja de publicar contenido de IA perfecto. Reddit te está baneando. Este analizador te dice si pareces un bot: {url}",
+    "¿Por qué unos posts explotan y otros mueren? Es el marco STEPPS. Mira tu score gratis: {url}"
+]
+BAITS_EN = [
+    "I analyzed the top 100 Reddit posts of 2026 using science. Most of you are failing at 'Social Currency'. Try this free tool to check your score: {url}",
+    "Stop posting 'perfect' AI content. Reddit is banning you. Here is a checker that tells you if your post looks like a bot: {url}",
+    "Why do some posts blow up while others die? It's not luck, it's the STEPPS framework. Check your score for free: {url}"
+]
+
 class MarketingOrchestrator:
     """
     Fulfills the 'Engineer as Marketing' autonomous strategy.
@@ -17,33 +29,21 @@ class MarketingOrchestrator:
         self.engine = ViralVortexEngine()
         # The URL of your free tool (Checker)
         self.checker_url = "http://localhost:5001/" 
+        # The URL never changes after construction, so render the baits once
+        self._baits_es = [t.format(url=self.checker_url) for t in BAITS_ES]
+        self._baits_en = [t.format(url=self.checker_url) for t in BAITS_EN]
 
     def generate_marketing_bait(self, language="es"):
         """
         Creates 'bait' content designed to make people curious 
         about their own content's virality.
         """
-        baits_es = [
-            "Analicé los 100 mejores posts de Reddit de 2026. La mayoría falla en 'Moneda Social'. Prueba esta herramienta gratis: {url}",
-            "Deja de publicar contenido de IA perfecto. Reddit te está baneando. Este analizador te dice si pareces un bot: {url}",
-            "¿Por qué unos posts explotan y otros mueren? Es el marco STEPPS. Mira tu score gratis: {url}"
-        ]
-        baits_en = [
-            "I analyzed the top 100 Reddit posts of 2026 using science. Most of you are failing at 'Social Currency'. Try this free tool to check your score: {url}",
-            "Stop posting 'perfect' AI content. Reddit is banning you. Here is a checker that tells you if your post looks like a bot: {url}",
-            "Why do some posts blow up while others die? It's not luck, it's the STEPPS framework. Check your score for free: {url}"
-        ]
-        baits = baits_es if language == "es" else baits_en
-        return random.choice(baits).format(url=self.checker_url)
+        return random.choice(self._baits_es if language == "es" else self._baits_en)
 
-    def run_autonomous_growth(self):
+    def plan_campaign(self):
         """
-        The Infinite Loop: 
-        1. Pick a community.
-        2. Check the vibe (Sentinel).
-        3. Generate bait.
-        4. Post it using a specific Persona.
-        5. Verify visibility.
+        Picks a community and builds the bait campaign for it
+        (kwargs for ViralVortexEngine.run_campaign).
         """
         targets = [
             {"platform": "reddit", "community": "r/sideproject", "lang": "en"},
@@ -55,27 +55,65 @@ class MarketingOrchestrator:
         target = random.choice(targets)
         topic = self.generate_marketing_bait(language=target['lang'])
         
-        print(f"🔄 [GROWTH LOOP] Attempting autonomous promotion on {target['community']} [{target['lang'].upper()}]")
-        
         persona = "Global_Mark" if target['lang'] == "en" else "CryptoSkeptic_Dave"
         
-        self.engine.run_campaign(
-            topic=topic,
-            persona_name=persona,
-            platform=target['platform'],
-            community=target['community'],
-            is_pro=False, # Lean launch: text only for baits
-            language=target['lang']
-        )
+        return {
+            "topic": topic,
+            "persona_name": persona,
+            "platform": target['platform'],
+            "community": target['community'],
+            "is_pro": False, # Lean launch: text only for baits
+            "language": target['lang']
+        }
+
+    async def run_autonomous_growth(self):
+        """
+        The Infinite Loop: 
+        1. Pick a community.
+        2. Check the vibe (Sentinel).
+        3. Generate bait.
+        4. Post it using a specific Persona.
+        5. Verify visibility.
+        """
+        campaign = self.plan_campaign()
+        print(f"🔄 [GROWTH LOOP] Attempting autonomous promotion on {campaign['community']} [{campaign['language'].upper()}]")
+        await self.engine.run_campaign_async(**campaign)
+
+    def run_batch_growth(self, campaigns=2):
+        """
+        Same as run_autonomous_growth, but plans a day's worth of campaigns and
+        generates them through the OpenAI Batch API (half price, not latency bound).
+        Posts go out once the batches complete.
+        """
+        plan = [self.plan_campaign() for _ in range(campaigns)]
+        print(f"🔄 [GROWTH LOOP] Batching {len(plan)} campaign(s): {', '.join(c['community'] for c in plan)}")
+        self.engine.run_campaigns_batch(plan)
+
+    async def scheduler(self, campaigns_per_wakeup=1, batch_mode=False):
+        """
+        Runs the growth loop forever on one event loop: each wake-up launches
+        `campaigns_per_wakeup` campaigns concurrently, then sleeps without
+        holding a thread.
+        """
+        # This would run on a schedule (e.g. every 12 hours)
+        while True:
+            if batch_mode:
+                # One Batch API submission per day instead of one live run per wake-up
+                await asyncio.to_thread(self.run_batch_growth, campaigns=2)
+                wait_time = 24 * 3600
+            else:
+                results = await asyncio.gather(
+                    *[self.run_autonomous_growth() for _ in range(campaigns_per_wakeup)],
+                    return_exceptions=True
+                )
+                for result in results:
+                    if isinstance(result, Exception):
+                        print(f"❌ [GROWTH LOOP] Campaign failed: {result}")
+                # Wait for a random interval to mimic human behavior (e.g. 8 to 14 hours)
+                wait_time = random.randint(8*3600, 14*3600)
+            print(f"💤 Sleeping for {wait_time/3600:.1f} hours to maintain human mimicry...")
+            await asyncio.sleep(wait_time)
 
 if __name__ == "__main__":
     orchestrator = MarketingOrchestrator()
-    
-    # This would run on a schedule (e.g. every 12 hours)
-    while True:
-        orchestrator.run_autonomous_growth()
-        
-        # Wait for a random interval to mimic human behavior (e.g. 8 to 14 hours)
-        wait_time = random.randint(8*3600, 14*3600)
-        print(f"💤 Sleeping for {wait_time/3600:.1f} hours to maintain human mimicry...")
-        time.sleep(wait_time)
+    asyncio.run(orchestrator.scheduler(batch_mode="--batch" in sys.argv))
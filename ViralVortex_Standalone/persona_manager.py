@@ -1,20 +1,30 @@
 import os
+import time
 import uuid
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
+from buffered_insert import BufferedInsert
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
 
+# Personas change rarely; get_by_name serves them from memory for this long
+PERSONA_CACHE_TTL = 300
+
 class PersonaManager:
     """
     Manages Viral Vortex personas and their long-term memory.
     Implements Supervisor Order #4: Multi-Persona Mesh with RAG capability.
     """
     
-    def __init__(self):
+    def __init__(self, http_client=None):
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
-        self.supabase: Client = create_client(url, key)
+        options = ClientOptions(httpx_client=http_client) if http_client else None
+        self.supabase: Client = create_client(url, key, options=options)
+        self._history_writer = BufferedInsert(self.supabase, "content_history")
+        self._by_name = {}
+        self._default_persona = None
+        self._personas_loaded_at = None
 
     def create_persona(self, name, backstory, tone, slang=[], platforms=["reddit", "twitter"]):
         """Creates a new persistent persona."""
@@ -26,15 +36,32 @@ class PersonaManager:
             "target_platforms": platforms
         }
         result = self.supabase.table("personas").insert(data).execute()
+        self._personas_loaded_at = None
         return result.data[0]
 
     def get_personas(self):
         """Retrieves all active personas."""
         result = self.supabase.table("personas").select("*").execute()
-        return result.data
+        personas = result.data
+        self._by_name = {p['name']: p for p in personas}
+        self._default_persona = personas[0] if personas else None
+        self._personas_loaded_at = time.monotonic()
+        return personas
+
+    def get_by_name(self, name):
+        """
+        O(1) persona lookup by name, falling back to the first persona.
+        The index is refreshed from Supabase every PERSONA_CACHE_TTL seconds.
+        """
+        if self._personas_loaded_at is None or time.monotonic() - self._personas_loaded_at > PERSONA_CACHE_TTL:
+            self.get_personas()
+        return self._by_name.get(name, self._default_persona)
 
     def record_content(self, persona_id, content, platform, score, embedding=None, video_url=None):
-        """Records a post in the history to enable long-term memory."""
+        """
+        Records a post in the history to enable long-term memory.
+        The row is buffered and written in batches (see BufferedInsert).
+        """
         data = {
             "persona_id": persona_id,
             "content": content,
@@ -43,8 +70,12 @@ class PersonaManager:
             "embedding": embedding,
             "video_url": video_url
         }
-        result = self.supabase.table("content_history").insert(data).execute()
-        return result.data[0]
+        self._history_writer.add(data)
+        return data
+
+    def flush(self):
+        """Writes any buffered content_history rows now."""
+        self._history_writer.flush()
 
     def get_persona_memory(self, persona_id, limit=5):
         """Retrieves recent history for a persona to maintain consistency."""
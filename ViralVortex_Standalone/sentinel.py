@@ -1,29 +1,69 @@
 import os
-import random
 import time
+import threading
+import numpy as np
 from supabase import create_client, Client
+from buffered_insert import BufferedInsert
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
 
+# Mock draws are taken from pre-generated NumPy pools instead of one RNG call each
+RNG_POOL_SIZE = 1024
+
+# Community sentiment moves slowly; reuse a verdict for this many seconds
+VERDICT_CACHE_TTL = 300
+
 class Sentinel:
     """
     Fulfills Supervisor Order #3: Sentiment Monitoring and Shadowban Sentinel.
     Protects automation by performing 'vibe checks'.
     """
     
-    def __init__(self):
-        url = os.getenv("SUPABASE_URL")
-        key = os.getenv("SUPABASE_KEY")
-        self.supabase: Client = create_client(url, key)
+    def __init__(self, supabase: Client = None):
+        if supabase is None:
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv("SUPABASE_KEY")
+            supabase = create_client(url, key)
+        self.supabase: Client = supabase
+        self._sentiment_writer = BufferedInsert(self.supabase, "community_sentiment")
+        self._rng = np.random.default_rng()
+        self._rng_lock = threading.Lock()
+        self._vibe_pool, self._vibe_idx = self._rng.uniform(-1, 1, RNG_POOL_SIZE), 0
+        self._visible_pool, self._visible_idx = self._rng.random(RNG_POOL_SIZE) < 0.75, 0
+        # (platform, community) -> (checked_at, is_safe, sentiment)
+        self._verdict_cache = {}
+
+    def _next_vibe(self):
+        with self._rng_lock:
+            if self._vibe_idx == RNG_POOL_SIZE:
+                self._vibe_pool, self._vibe_idx = self._rng.uniform(-1, 1, RNG_POOL_SIZE), 0
+            value = self._vibe_pool[self._vibe_idx]
+            self._vibe_idx += 1
+        return float(value)
+
+    def _next_visible(self):
+        with self._rng_lock:
+            if self._visible_idx == RNG_POOL_SIZE:
+                self._visible_pool, self._visible_idx = self._rng.random(RNG_POOL_SIZE) < 0.75, 0
+            value = self._visible_pool[self._visible_idx]
+            self._visible_idx += 1
+        return bool(value)
 
     def check_community_vibe(self, platform, community):
         """
         Simulates checking if a community is currently 'hot' or 'hostile'.
         In production, this would scrape the latest 10 posts.
+        Verdicts are cached per (platform, community) for VERDICT_CACHE_TTL
+        seconds; cache hits skip both the check and the Supabase insert.
         """
+        key = (platform, community)
+        cached = self._verdict_cache.get(key)
+        if cached and time.monotonic() - cached[0] < VERDICT_CACHE_TTL:
+            return cached[1], cached[2]
+
         # TODO: Implement real-time scraping integration
-        sentiment = random.uniform(-1, 1) # Mock sentiment
+        sentiment = self._next_vibe() # Mock sentiment
         is_safe = sentiment > -0.3 # If too toxic, don't post
         
         data = {
@@ -32,9 +72,14 @@ class Sentinel:
             "sentiment_score": sentiment,
             "is_safe_to_post": is_safe
         }
-        self.supabase.table("community_sentiment").insert(data).execute()
+        self._sentiment_writer.add(data)
+        self._verdict_cache[key] = (time.monotonic(), is_safe, sentiment)
         return is_safe, sentiment
 
+    def flush(self):
+        """Writes any buffered sentiment rows now."""
+        self._sentiment_writer.flush()
+
     def verify_post_visibility(self, post_id_on_platform):
         """
         Fulfills the 'Sentinel' duty: Check if the post is visible 15min later.
@@ -42,7 +87,7 @@ class Sentinel:
         """
         print(f"Waiting 1s to verify visibility for {post_id_on_platform}... (Mocked)")
         # In a real scenario, we check the post URL from an incognito session/different proxy
-        is_visible = random.choice([True, True, True, False]) # 75% success rate simulation
+        is_visible = self._next_visible() # 75% success rate simulation
         return is_visible
 
 if __name__ == "__main__":
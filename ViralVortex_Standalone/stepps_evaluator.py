@@ -1,25 +1,46 @@
 import os
+import re
 import json
-from openai import OpenAI
+import asyncio
+from openai import OpenAI, AsyncOpenAI
+from llm_cache import CachedLLM
+from dotenv import load_dotenv
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json is a drop-in fallback
+    json_loads = json.loads
+
+load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
+
+EVAL_MODEL = os.getenv("EVAL_MODEL", "gpt-4o")
 
 class STEPPSEvaluator:
     """
     Evaluates content based on Jonah Berger's STEPPS framework.
     Required by the PRD for Quality Gate.
     """
-    
-    def __init__(self, api_key=None):
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
 
-    def evaluate(self, content):
-        """
-        Scores content from 0 to 10 on the 6 pulses.
-        """
+    # Posts packed into a single request by evaluate_many (keeps the prompt well
+    # inside the context window while cutting request count ~N×).
+    MAX_BATCH = 10
+
+    # Matches a complete total_score number (followed by a delimiter) in partial JSON
+    _TOTAL_SCORE_RE = re.compile(r'"total_score"\s*:\s*(-?\d+(?:\.\d+)?)\s*[,}]')
+
+    def __init__(self, api_key=None, use_cache=True, http_client=None, async_http_client=None):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.client = OpenAI(api_key=api_key, http_client=http_client)
+        self.aclient = AsyncOpenAI(api_key=api_key, http_client=async_http_client)
+        self.cache = CachedLLM(self.client, self.aclient) if use_cache else None
+
+    def _messages(self, content):
         prompt = f"""
         Evaluate the following content according to Jonah Berger's STEPPS framework:
-        
+
         Content: "{content}"
-        
+
         Provide a JSON response with scores (0-10) for:
         - social_currency
         - triggers
@@ -30,16 +51,178 @@ class STEPPSEvaluator:
         - total_score (average)
         - feedback (briefly how to improve)
         """
-        
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a scientific evaluator of viral content."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={ "type": "json_object" }
+        return [
+            {"role": "system", "content": "You are a scientific evaluator of viral content."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _stream_messages(self, content):
+        # total_score goes first so the caller can reject before the rest is generated
+        prompt = f"""
+        Evaluate the following content according to Jonah Berger's STEPPS framework:
+
+        Content: "{content}"
+
+        Provide a JSON response whose FIRST key is total_score, then scores (0-10) for:
+        - total_score (average of the six scores below)
+        - social_currency
+        - triggers
+        - emotion
+        - public
+        - practical_value
+        - stories
+        - feedback (briefly how to improve)
+        """
+        return [
+            {"role": "system", "content": "You are a scientific evaluator of viral content."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _batch_messages(self, contents):
+        posts = "\n\n".join(f'Post {i + 1}: "{c}"' for i, c in enumerate(contents))
+        prompt = f"""
+        Evaluate each of the following {len(contents)} posts according to Jonah Berger's STEPPS framework:
+
+        {posts}
+
+        Provide a JSON object {{"results": [...]}} with exactly one entry per post, in the same order.
+        Each entry has scores (0-10) for:
+        - social_currency
+        - triggers
+        - emotion
+        - public
+        - practical_value
+        - stories
+        - total_score (average)
+        - feedback (briefly how to improve)
+        """
+        return [
+            {"role": "system", "content": "You are a scientific evaluator of viral content."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _parse_batch(self, raw, expected):
+        results = json_loads(raw).get("results", [])
+        if len(results) != expected:
+            raise ValueError(f"Expected {expected} STEPPS results, got {len(results)}")
+        return results
+
+    def _chunks(self, contents):
+        return [contents[i:i + self.MAX_BATCH] for i in range(0, len(contents), self.MAX_BATCH)]
+
+    def evaluate(self, content):
+        """
+        Scores content from 0 to 10 on the 6 pulses.
+        """
+        messages = self._messages(content)
+
+        def call():
+            response = self.client.chat.completions.create(
+                model=EVAL_MODEL,
+                messages=messages,
+                response_format={ "type": "json_object" }
+            )
+            return response.choices[0].message.content
+
+        raw = self.cache.get_or_compute("evaluate", EVAL_MODEL, messages, call) if self.cache else call()
+        return json_loads(raw)
+
+    async def aevaluate(self, content):
+        """
+        Async variant of evaluate (non-blocking I/O).
+        """
+        messages = self._messages(content)
+
+        async def call():
+            response = await self.aclient.chat.completions.create(
+                model=EVAL_MODEL,
+                messages=messages,
+                response_format={ "type": "json_object" }
+            )
+            return response.choices[0].message.content
+
+        raw = await self.cache.aget_or_compute("evaluate", EVAL_MODEL, messages, call) if self.cache else await call()
+        return json_loads(raw)
+
+    async def aevaluate_stream(self, content, min_score=None):
+        """
+        Streams the evaluation and yields events as they become available:
+        ("total_score", score) as soon as the number is complete, then
+        ("result", rating). If the score is below `min_score` the stream is
+        closed early and the result only carries total_score and feedback.
+        """
+        stream = await self.aclient.chat.completions.create(
+            model=EVAL_MODEL,
+            messages=self._stream_messages(content),
+            response_format={ "type": "json_object" },
+            stream=True
         )
-        return json.loads(response.choices[0].message.content)
+        buffer = ""
+        score = None
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                buffer += chunk.choices[0].delta.content or ""
+                if score is None:
+                    match = self._TOTAL_SCORE_RE.search(buffer)
+                    if match:
+                        score = float(match.group(1))
+                        yield "total_score", score
+                        if min_score is not None and score < min_score:
+                            yield "result", {
+                                "total_score": score,
+                                "feedback": f"Early reject: total_score below {min_score}",
+                                "early_reject": True
+                            }
+                            return
+        finally:
+            await stream.close()
+
+        yield "result", json_loads(buffer)
+
+    def batch_request(self, custom_id, content):
+        """Batch JSONL line equivalent to evaluate (see Humanizer.submit_batch)."""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": EVAL_MODEL,
+                "messages": self._messages(content),
+                "response_format": { "type": "json_object" }
+            }
+        }
+
+    def evaluate_many(self, contents):
+        """
+        Scores several posts with one request per MAX_BATCH posts.
+        Results are returned in the same order as `contents`.
+        """
+        results = []
+        for chunk in self._chunks(contents):
+            response = self.client.chat.completions.create(
+                model=EVAL_MODEL,
+                messages=self._batch_messages(chunk),
+                response_format={ "type": "json_object" }
+            )
+            results.extend(self._parse_batch(response.choices[0].message.content, len(chunk)))
+        return results
+
+    async def aevaluate_many(self, contents):
+        """
+        Async variant of evaluate_many; chunks are scored concurrently.
+        """
+        async def score(chunk):
+            response = await self.aclient.chat.completions.create(
+                model=EVAL_MODEL,
+                messages=self._batch_messages(chunk),
+                response_format={ "type": "json_object" }
+            )
+            return self._parse_batch(response.choices[0].message.content, len(chunk))
+
+        scored = await asyncio.gather(*(score(chunk) for chunk in self._chunks(contents)))
+        return [result for chunk in scored for result in chunk]
 
 if __name__ == "__main__":
     evaluator = STEPPSEvaluator()
@@ -0,0 +1,37 @@
+-- =============================================================================
+-- Viral Vortex - Dashboard snapshot RPC
+-- Returns everything the Pro dashboard renders on load (stats, last 10 posts,
+-- last 50 leads, personas) in a single round-trip for /api/dashboard
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION dashboard_snapshot()
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT json_build_object(
+    'stats', json_build_object(
+      'leads', (SELECT count(*) FROM leads),
+      'count', (SELECT count(*) FROM content_history),
+      'sum_score', (SELECT coalesce(sum(virality_score), 0) FROM content_history),
+      'avg_score', (SELECT avg(virality_score) FROM content_history)
+    ),
+    'history', coalesce((
+      SELECT json_agg(h ORDER BY h.created_at DESC)
+      FROM (
+        SELECT ch.*, json_build_object('name', p.name) AS personas
+        FROM content_history ch
+        LEFT JOIN personas p ON p.id = ch.persona_id
+        ORDER BY ch.created_at DESC
+        LIMIT 10
+      ) h
+    ), '[]'::json),
+    'leads', coalesce((
+      SELECT json_agg(l ORDER BY l.created_at DESC)
+      FROM (SELECT * FROM leads ORDER BY created_at DESC LIMIT 50) l
+    ), '[]'::json),
+    'personas', coalesce((SELECT json_agg(p) FROM personas p), '[]'::json)
+  );
+$$;
+
+GRANT EXECUTE ON FUNCTION dashboard_snapshot() TO anon, authenticated, service_role;
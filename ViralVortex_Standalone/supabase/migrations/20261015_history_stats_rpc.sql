@@ -0,0 +1,20 @@
+-- =============================================================================
+-- Viral Vortex - Dashboard stats RPC
+-- Aggregates content_history server-side so /api/stats fetches one row
+-- instead of every virality_score
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION get_history_stats()
+RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT json_build_object(
+    'count', count(*),
+    'sum_score', coalesce(sum(virality_score), 0),
+    'avg_score', avg(virality_score)
+  )
+  FROM content_history;
+$$;
+
+GRANT EXECUTE ON FUNCTION get_history_stats() TO anon, authenticated, service_role;
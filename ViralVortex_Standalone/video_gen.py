@@ -1,10 +1,20 @@
 import os
 import time
+import asyncio
 from dotenv import load_dotenv
 import fal_client
 
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env.local'))
 
+# Worst-case wait for a fal.ai job before falling back to the mock clip
+VIDEO_TIMEOUT = 30
+
+MOCK_VIDEO = {
+    "video_url": "https://storage.googleapis.com/falserverless/model_tests/wan/test_video.mp4",
+    "status": "success",
+    "model": "wan-2.1"
+}
+
 class VideoGenerator:
     """
     Integrates Wan 2.1 Video Generation via fal.ai.
@@ -24,11 +34,7 @@ class VideoGenerator:
         if not self.api_key:
             print("⚠️ FAL_KEY not found. Running in MOCK mode.")
             time.sleep(3)
-            return {
-                "video_url": "https://storage.googleapis.com/falserverless/model_tests/wan/test_video.mp4",
-                "status": "success",
-                "model": "wan-2.1"
-            }
+            return dict(MOCK_VIDEO)
             
         try:
             handler = fal_client.submit(
@@ -50,6 +56,59 @@ class VideoGenerator:
             print(f"❌ Error in Wan 2.1 Generation: {str(e)}")
             return {"status": "error", "message": str(e)}
 
+    async def agenerate_video(self, prompt, duration="5s", timeout=VIDEO_TIMEOUT):
+        """
+        Async variant of generate_video bounded by `timeout` seconds.
+        On timeout the fal.ai job is cancelled and the mock clip is returned;
+        cancelling the calling task also cancels the fal.ai job.
+        """
+        print(f"🎬 [FAL.AI] Generating Wan 2.1 Video: '{prompt}'")
+
+        if not self.api_key:
+            print("⚠️ FAL_KEY not found. Running in MOCK mode.")
+            await asyncio.sleep(3)
+            return dict(MOCK_VIDEO)
+
+        handler = None
+
+        async def run():
+            nonlocal handler
+            handler = await fal_client.submit_async(
+                "fal-ai/wan/v2.1/text-to-video",
+                arguments={
+                    "prompt": prompt,
+                    "aspect_ratio": "16:9",
+                    "num_frames": 81 # Standard for ~5s
+                }
+            )
+            return await handler.get()
+
+        try:
+            result = await asyncio.wait_for(run(), timeout)
+            return {
+                "video_url": result['video']['url'],
+                "status": "success",
+                "model": "wan-2.1"
+            }
+        except asyncio.TimeoutError:
+            print(f"⏱️ Wan 2.1 Generation timed out after {timeout}s. Using fallback clip.")
+            await self._cancel(handler)
+            return dict(MOCK_VIDEO, status="fallback")
+        except asyncio.CancelledError:
+            await self._cancel(handler)
+            raise
+        except Exception as e:
+            print(f"❌ Error in Wan 2.1 Generation: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    async def _cancel(self, handler):
+        if handler is None:
+            return
+        try:
+            await handler.cancel()
+        except Exception as e:
+            print(f"⚠️ Could not cancel fal.ai job: {e}")
+
 if __name__ == "__main__":
     vg = VideoGenerator()
     # Test call
@@ -1,11 +1,39 @@
 from flask import Flask, render_template, send_from_directory, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 import os
+import atexit
 import json
 import random
+import time
+import numpy as np
 from engine import ViralVortexEngine
+from campaign_queue import CampaignQueue
+from buffered_insert import BufferedInsert
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to Flask's stdlib JSON provider
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify() backed by orjson (C extension, fast UTF-8 for Spanish content)."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__, template_folder='.')
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 engine = ViralVortexEngine()
+# Un único event loop en segundo plano para todas las campañas (y el cliente AsyncOpenAI)
+campaign_queue = CampaignQueue(engine, workers=8, maxsize=100).start()
+# Cerrar los pools HTTP compartidos al apagar el servidor
+atexit.register(lambda: campaign_queue.run(engine.aclose(), timeout=5))
+# Los leads del checker se escriben por lotes (un insert por cada 50 o cada 5s)
+lead_writer = BufferedInsert(engine.persona_manager.supabase, "leads")
 
 @app.route('/')
 def home():
@@ -15,32 +43,95 @@ def home():
 def dashboard():
     return send_from_directory('.', 'dashboard_pro.html')
 
+def format_stats(leads_count, history_count, score_sum, avg_score):
+    # Impresiones (Suma de alcance proyectado)
+    impressions = score_sum * 1000 or 1240000
+    
+    # Puntuación Media
+    avg_score = avg_score if history_count else 8.9
+
+    return {
+        "impressions": f"{impressions/1e6:.1f}M" if impressions >= 1e6 else f"{impressions/1e3:.1f}K",
+        "avg_score": round(avg_score, 1),
+        "leads": leads_count or 432,
+        "conversion": "4.2%"
+    }
+
 @app.route('/api/stats', methods=['GET'])
 def api_stats():
     # Recuperamos estadísticas reales de Supabase
     try:
-        # Leads (Simulados en la tabla leads o contando registros en history)
-        leads_count = engine.persona_manager.supabase.table("leads").select("id", count="exact").execute().count or 432
-        
-        # Impresiones (Suma de alcance proyectado)
-        history = engine.persona_manager.supabase.table("content_history").select("virality_score").execute().data
-        impressions = sum([h['virality_score'] * 1000 for h in history]) or 1240000
+        supabase = engine.persona_manager.supabase
+
+        # Leads: solo el conteo (head=True no descarga filas)
+        leads_count = supabase.table("leads").select("id", count="exact", head=True).execute().count
         
-        # Puntuación Media
-        avg_score = sum([h['virality_score'] for h in history]) / len(history) if history else 8.9
+        # Impresiones y puntuación media agregadas en Postgres (una fila en vez de todo el historial)
+        history_count, score_sum, avg_score = history_stats(supabase)
+
+        return jsonify({"success": True, "data": format_stats(leads_count, history_count, score_sum, avg_score)})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)})
 
+@app.route('/api/dashboard', methods=['GET'])
+def api_dashboard():
+    """Stats, historial, leads y personas en una sola llamada (RPC dashboard_snapshot)."""
+    try:
+        snapshot = engine.persona_manager.supabase.rpc("dashboard_snapshot").execute().data
+        stats = snapshot['stats']
         return jsonify({
             "success": True,
             "data": {
-                "impressions": f"{impressions/1e6:.1f}M" if impressions >= 1e6 else f"{impressions/1e3:.1f}K",
-                "avg_score": round(avg_score, 1),
-                "leads": leads_count,
-                "conversion": "4.2%"
+                "stats": format_stats(
+                    stats['leads'],
+                    stats['count'],
+                    float(stats['sum_score'] or 0),
+                    float(stats['avg_score'] or 0)
+                ),
+                "history": snapshot['history'],
+                "leads": snapshot['leads'],
+                "personas": snapshot['personas']
             }
         })
     except Exception as e:
         return jsonify({"success": False, "message": str(e)})
 
+# Caché del escaneo de historial (solo para el fallback sin RPC)
+HISTORY_CACHE_TTL = 30
+_history_cache = {"expires": 0.0, "latest": None, "stats": None}
+
+def history_stats(supabase):
+    """Returns (count, sum, avg) of content_history.virality_score."""
+    try:
+        stats = supabase.rpc("get_history_stats").execute().data
+        return stats['count'], float(stats['sum_score'] or 0), float(stats['avg_score'] or 0)
+    except Exception as e:
+        # Fallback si la migración get_history_stats() aún no está aplicada
+        print(f"get_history_stats RPC unavailable ({e}), aggregating in Python")
+        return scan_history_stats(supabase)
+
+def scan_history_stats(supabase):
+    """
+    Full-table fallback, reduced with NumPy. The result is cached for
+    HISTORY_CACHE_TTL seconds and then revalidated against the newest
+    created_at, so dashboard polls don't re-download unchanged history.
+    """
+    now = time.monotonic()
+    if _history_cache["stats"] is not None and now < _history_cache["expires"]:
+        return _history_cache["stats"]
+
+    newest = supabase.table("content_history").select("created_at").order("created_at", desc=True).limit(1).execute().data
+    latest = newest[0]['created_at'] if newest else None
+    if _history_cache["stats"] is None or latest != _history_cache["latest"]:
+        history = supabase.table("content_history").select("virality_score").execute().data
+        scores = np.fromiter((h['virality_score'] or 0 for h in history), dtype=np.float64, count=len(history))
+        total = float(scores.sum())
+        _history_cache["stats"] = (len(scores), total, float(scores.mean()) if len(scores) else 0.0)
+        _history_cache["latest"] = latest
+
+    _history_cache["expires"] = now + HISTORY_CACHE_TTL
+    return _history_cache["stats"]
+
 @app.route('/api/personas', methods=['GET'])
 def api_get_personas():
     try:
@@ -68,7 +159,12 @@ def api_analyze():
     content = data.get('content', '')
     if not content:
         return jsonify({"success": False, "message": "No content provided"})
-    
+
+    # A list of posts is scored in batched requests (one per MAX_BATCH posts)
+    if isinstance(content, list):
+        ratings = campaign_queue.run(engine.evaluator.aevaluate_many(content))
+        return jsonify({"success": True, "data": ratings})
+
     rating = engine.evaluator.evaluate(content)
     return jsonify({"success": True, "data": rating})
 
@@ -85,13 +181,18 @@ def api_launch():
     if not topic:
         return jsonify({"success": False, "message": "No topic provided"})
 
-    # Usar threading para no bloquear el servidor si hay video
-    import threading
-    def worker():
-        engine.run_campaign(topic, persona_name=persona, platform=platform, community=community, is_pro=is_pro, language=language)
-    
-    threading.Thread(target=worker).start()
-    
+    # Encolar en el loop de campañas para no bloquear el servidor si hay video
+    queued = campaign_queue.submit(
+        topic=topic,
+        persona_name=persona,
+        platform=platform,
+        community=community,
+        is_pro=is_pro,
+        language=language
+    )
+    if not queued:
+        return jsonify({"success": False, "message": "Cola de campañas llena, inténtalo más tarde"}), 503
+
     return jsonify({
         "success": True, 
         "message": "Motor Vortex iniciado en segundo plano",
@@ -122,7 +223,7 @@ def api_save_lead():
     
     try:
         # Guardar en Supabase (tabla 'leads')
-        engine.persona_manager.supabase.table("leads").insert({"email": email, "source": "vortex_checker"}).execute()
+        lead_writer.add({"email": email, "source": "vortex_checker"})
         return jsonify({"success": True, "message": "Lead saved"})
     except Exception as e:
         print(f"Error saving lead: {e}")
@@ -2,32 +2,145 @@
 Lead Finder AI - AI-Powered Lead Generator
 Generates realistic leads using OpenAI when real APIs are not configured
 """
+import re
 import json
+import time
 import random
-from datetime import datetime, timedelta
-from openai import OpenAI
+import asyncio
+import contextlib
+import contextvars
+import importlib.util
+from datetime import datetime, timedelta, timezone
+import httpx
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    DefaultHttpxClient,
+    DefaultAsyncHttpxClient,
+    RateLimitError,
+    APIConnectionError,
+    InternalServerError,
+)
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
+from pydantic import BaseModel, ConfigDict, ValidationError
 import os
 
-def generate_leads_with_ai(keywords: list, num_leads: int = 5, user_id: int = None):
+try:
+    # aiohttp-backed transport (`pip install openai[aiohttp]`); httpx's own
+    # async pool degrades under high request concurrency
+    from openai import DefaultAioHttpClient
+except ImportError:
+    DefaultAioHttpClient = None
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:  # orjson is optional; stdlib json is a drop-in fallback
+    json_loads = json.loads
+
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+
+# Leads per scoring request and scoring requests in flight at once
+SCORE_BATCH_SIZE = 10
+MAX_CONCURRENT_REQUESTS = 10
+
+# Markdown code fence around model output, e.g. ```json ... ```
+_FENCE_RE = re.compile(r'(?:```|~~~)[ \t]*(?:json)?[ \t]*\n?(.*?)(?:```|~~~)', re.DOTALL | re.IGNORECASE)
+
+# Shared connection pool settings. HTTP/2 needs the optional h2 package
+# (httpx[http2]); without it the clients fall back to HTTP/1.1 keep-alive.
+HTTP2 = importlib.util.find_spec('h2') is not None
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=50)
+HTTP_TIMEOUT = 60.0
+
+# Rate limits, 5xx and dropped connections are retried with jittered
+# exponential backoff. The SDK's own retries are disabled (max_retries=0)
+# so attempts don't multiply.
+_openai_retry = retry(
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(min=1, max=30),
+    reraise=True
+)
+
+_client = None
+# AsyncOpenAI client of the current _async_client_scope(); a context variable,
+# so pipelines running in other threads or event loops never share one
+_async_client_var = contextvars.ContextVar('ai_generator_async_client', default=None)
+
+
+class GeneratedLead(BaseModel):
+    """Shape of one lead from generate_leads_with_ai; defaults fill missing fields."""
+    model_config = ConfigDict(extra='allow')
+
+    platform: str = 'unknown'
+    username: str = 'unknown'
+    title: str = ''
+    content: str = ''
+    urgency: int = 5
+    budget_indicator: str = 'medium'
+    pain_points: list[str] = []
+
+
+class LeadScore(BaseModel):
+    """Shape of a lead score returned by the scoring helpers."""
+    model_config = ConfigDict(extra='allow')
+
+    score: int = 5
+    urgency: int = 5
+    budget_indicator: str = 'medium'
+    problem_summary: str = ''
+    recommended_approach: str = ''
+    pain_points: list[str] = []
+    reason: str = ''
+
+
+class BatchLeadScore(LeadScore):
+    idx: int
+
+
+def _validate_repairing(model, item, label: str):
     """
-    Generate realistic leads using OpenAI based on user keywords
-    This is used when Reddit/Twitter APIs are not configured
+    model.model_validate(item), except that fields failing validation fall
+    back to their defaults (and are logged) instead of rejecting the whole
+    object. Still raises ValidationError if item is not an object or a
+    required field is invalid.
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("Error: OPENAI_API_KEY not configured")
-        return []
-    
-    client = OpenAI(api_key=api_key)
-    
-    platforms = ['reddit', 'twitter', 'hackernews', 'indiehackers', 'linkedin']
-    
-    prompt = f"""Generate {num_leads} realistic social media posts from people who might be potential leads for a B2B service.
+    try:
+        return model.model_validate(item)
+    except ValidationError as e:
+        if not isinstance(item, dict):
+            raise
+        invalid = {err['loc'][0] for err in e.errors() if err['loc']}
+        print(f"Repairing {label}: invalid {', '.join(sorted(map(str, invalid)))}")
+        return model.model_validate({k: v for k, v in item.items() if k not in invalid})
 
-These people should be expressing problems, frustrations, or needs related to these topics: {', '.join(keywords)}
+
+def _validate_generated_leads(items: list) -> list:
+    """
+    Validate each generated lead on its own, so one bad value costs only that
+    field: fields that fail validation fall back to their defaults, and
+    entries that are not objects are dropped.
+    """
+    leads = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict):
+            print(f"Dropping generated lead {position}: not a JSON object")
+            continue
+        leads.append(_validate_repairing(GeneratedLead, item, f"generated lead {position}").model_dump())
+    return leads
+
+# Static instructions live in the system message and only the per-call data
+# goes at the end of the user message, so consecutive calls share a
+# byte-identical prefix that OpenAI's automatic prompt caching can reuse.
+LEAD_PLATFORMS = ['reddit', 'twitter', 'hackernews', 'indiehackers', 'linkedin']
+
+LEAD_GENERATION_SYSTEM_PROMPT = f"""You are a data generator that creates realistic social media posts from people who might be potential leads for a B2B service. Always respond with valid JSON only, no markdown.
 
 For each lead, provide:
-- platform: one of {platforms}
+- platform: one of {LEAD_PLATFORMS}
 - username: a realistic but fictional username
 - title: the post title or tweet first line
 - content: the full post content (2-4 sentences, realistic tone)
@@ -50,36 +163,163 @@ Example format:
   }}
 ]"""
 
+_SCORING_CRITERIA = """Score each lead from 1-10 based on:
+- Urgency of their need (are they ready to buy now?)
+- Budget indicators (do they seem to have money to spend?)
+- Problem clarity (is their pain point clear?)
+- Decision maker likelihood (do they seem like they can make buying decisions?)"""
+
+SCORE_SYSTEM_PROMPT = f"""You are a multilingual lead qualification expert. Analyze the social media post you are given and score the person as a potential B2B lead. Always respond with valid JSON only.
+
+{_SCORING_CRITERIA}
+
+Write problem_summary, recommended_approach and reason in the language requested with the post.
+
+Return JSON only:
+{{
+  "score": <1-10>,
+  "urgency": <1-10>,
+  "budget_indicator": "low|medium|high|enterprise",
+  "problem_summary": "<one sentence summary of their main problem>",
+  "recommended_approach": "<how to approach them>",
+  "pain_points": ["<pain1>", "<pain2>"],
+  "language_detected": "<language code>",
+  "reason": "<why this score>"
+}}"""
+
+BATCH_SCORE_SYSTEM_PROMPT = f"""You are a multilingual lead qualification expert. Analyze the social media posts you are given and score each person as a potential B2B lead. Always respond with valid JSON only.
+
+{_SCORING_CRITERIA}
+
+Write the text fields of each result in the language shown for that post.
+
+Return a JSON array only, with one object per post and the same idx:
+[
+  {{
+    "idx": <idx>,
+    "score": <1-10>,
+    "urgency": <1-10>,
+    "budget_indicator": "low|medium|high|enterprise",
+    "problem_summary": "<one sentence summary of their main problem>",
+    "recommended_approach": "<how to approach them>",
+    "pain_points": ["<pain1>", "<pain2>"],
+    "language_detected": "<language code>",
+    "reason": "<why this score>"
+  }}
+]"""
+
+_EMAIL_GUIDELINES = """Write an email that:
+1. References their specific problem (don't be generic)
+2. Shows empathy for their situation
+3. Briefly mentions how you can help
+4. Has a soft call-to-action (not pushy)
+5. Feels human, not like a template
+6. Is short (under 150 words)
+7. Is written in the lead's language - VERY IMPORTANT!"""
+
+EMAIL_SYSTEM_PROMPT = f"""You are an expert at writing personalized cold emails that get responses. Always respond with valid JSON only.
+
+{_EMAIL_GUIDELINES}
+
+Return JSON (with subject and body in the lead's language):
+{{
+  "subject": "<catchy but professional subject line>",
+  "body": "<the email body>",
+  "language": "<language code>"
+}}"""
+
+SCORE_AND_EMAIL_SYSTEM_PROMPT = f"""You are a multilingual lead qualification expert who also writes personalized cold emails that get responses. For the social media post you are given, score the person as a potential B2B lead and write them a cold email. Always respond with valid JSON only.
+
+{_SCORING_CRITERIA}
+
+{_EMAIL_GUIDELINES}
+
+Write problem_summary, recommended_approach, reason and the email in the language requested with the post.
+
+Return JSON only:
+{{
+  "score": {{
+    "score": <1-10>,
+    "urgency": <1-10>,
+    "budget_indicator": "low|medium|high|enterprise",
+    "problem_summary": "<one sentence summary of their main problem>",
+    "recommended_approach": "<how to approach them>",
+    "pain_points": ["<pain1>", "<pain2>"],
+    "language_detected": "<language code>",
+    "reason": "<why this score>"
+  }},
+  "email": {{
+    "subject": "<catchy but professional subject line>",
+    "body": "<the email body>",
+    "language": "<language code>"
+  }}
+}}"""
+
+# Language-specific instructions
+SCORE_LANGUAGE_INSTRUCTIONS = {
+    'en': "Respond in English.",
+    'es': "Responde en español.",
+    'pt': "Responda em português.",
+    'fr': "Répondez en français."
+}
+
+EMAIL_LANGUAGE_INSTRUCTIONS = {
+    'en': "Write the email in ENGLISH.",
+    'es': "Escribe el email EN ESPAÑOL. El lead habla español.",
+    'pt': "Escreva o email EM PORTUGUÊS. O lead fala português.",
+    'fr': "Écrivez l'email EN FRANÇAIS. Le lead parle français.",
+}
+
+def generate_leads_with_ai(keywords: list, num_leads: int = 5, user_id: int = None):
+    """
+    Generate realistic leads using OpenAI based on user keywords
+    This is used when Reddit/Twitter APIs are not configured
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        print("Error: OPENAI_API_KEY not configured")
+        return []
+    
+    client = _get_client()
+    
+    prompt = f"""Generate {num_leads} realistic social media posts.
+
+These people should be expressing problems, frustrations, or needs related to these topics: {', '.join(keywords)}"""
+
     try:
-        response = client.chat.completions.create(
+        content = _stream_json(
+            client,
             model="gpt-4o-mini",
             messages=[
-                {"role": "system", "content": "You are a data generator that creates realistic social media posts. Always respond with valid JSON only, no markdown."},
+                {"role": "system", "content": LEAD_GENERATION_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.9,
             max_tokens=2000
         )
         
-        content = response.choices[0].message.content.strip()
         # Clean up any markdown formatting
-        if content.startswith('```'):
-            content = content.split('```')[1]
-            if content.startswith('json'):
-                content = content[4:]
+        content = _strip_fences(content)
         
-        leads_data = json.loads(content)
+        # Missing or invalid fields get their defaults
+        items = json_loads(content)
+        if not isinstance(items, list):
+            raise ValueError("expected a JSON array of leads")
+        leads_data = _validate_generated_leads(items)
         
-        # Add metadata
-        for lead in leads_data:
-            lead['source_created_at'] = (datetime.utcnow() - timedelta(hours=random.randint(1, 48))).isoformat()
-            lead['post_url'] = f"https://{lead['platform']}.com/post/{random.randint(10000, 99999)}"
+        # Add metadata (one clock read and one batch of random draws for all leads)
+        now = datetime.now(timezone.utc)
+        hours_ago = random.choices(range(1, 49), k=len(leads_data))
+        post_ids = random.choices(range(10000, 100000), k=len(leads_data))
+        for lead, hours, post_id in zip(leads_data, hours_ago, post_ids):
+            lead['source_created_at'] = (now - timedelta(hours=hours)).isoformat()
+            lead['post_url'] = f"https://{lead['platform']}.com/post/{post_id}"
             lead['generated_by'] = 'openai'
         
         print(f"✓ Generated {len(leads_data)} leads with OpenAI")
         return leads_data
         
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         print(f"Error parsing OpenAI response: {e}")
         print(f"Raw response: {content[:500]}")
         return []
@@ -88,125 +328,354 @@ Example format:
         return []
 
 
-def score_lead_with_ai(lead_data: dict) -> dict:
+def _get_client():
     """
-    Score a lead using OpenAI to determine its quality.
-    Detects language and responds in the same language.
+    Module-wide OpenAI client, created on first use so every call reuses the
+    same connection pool (HTTP/2 when available, one multiplexed TLS
+    connection). The API key comes from OPENAI_API_KEY.
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        return {'score': 5, 'reason': 'API not configured'}
-    
-    client = OpenAI(api_key=api_key)
-    
+    global _client
+    if _client is None:
+        _client = OpenAI(
+            max_retries=0,
+            http_client=DefaultHttpxClient(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        )
+    return _client
+
+
+def _async_http_client():
+    """aiohttp transport when installed, otherwise the SDK's httpx AsyncClient."""
+    if DefaultAioHttpClient is not None:
+        try:
+            return DefaultAioHttpClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        except RuntimeError:  # openai installed without the aiohttp extra
+            pass
+    return DefaultAsyncHttpxClient(http2=HTTP2, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+
+@contextlib.asynccontextmanager
+async def _async_client_scope():
+    """
+    AsyncOpenAI client for the calls inside the block. The outermost scope
+    opens it and closes it on exit, while its event loop is still running;
+    nested scopes, and tasks started inside the block, reuse the same pool.
+    """
+    client = _async_client_var.get()
+    if client is not None:
+        yield client
+        return
+    client = AsyncOpenAI(max_retries=0, http_client=_async_http_client())
+    token = _async_client_var.set(client)
+    try:
+        yield client
+    finally:
+        _async_client_var.reset(token)
+        await client.close()
+
+
+def _strip_fences(content: str) -> str:
+    """Return the body of a ```json / ~~~ fenced block, or the content unchanged."""
+    m = _FENCE_RE.search(content)
+    return (m.group(1) if m else content).strip()
+
+
+class _JSONScanner:
+    """
+    Tracks bracket depth over streamed text to spot where the top-level JSON
+    value ends, so the stream can be closed without waiting for trailing text.
+    """
+
+    def __init__(self):
+        self.parts = []
+        self.length = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.start = None
+        self.end = None
+
+    def feed(self, text: str) -> bool:
+        """Add a chunk; returns True once the top-level value is complete."""
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = self.start is not None
+            elif ch in '[{':
+                if self.start is None:
+                    self.start = self.length + i
+                self.depth += 1
+            elif ch in ']}' and self.start is not None:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = self.length + i
+                    self.parts.append(text[:i + 1])
+                    self.length += i + 1
+                    return True
+        self.parts.append(text)
+        self.length += len(text)
+        return False
+
+    def text(self) -> str:
+        """The complete JSON value if one was seen, else everything received."""
+        content = ''.join(self.parts)
+        if self.end is not None:
+            return content[self.start:self.end + 1]
+        return content
+
+
+@_openai_retry
+def _create_completion(client, **params):
+    """chat.completions.create with retry/backoff on transient errors."""
+    return client.chat.completions.create(**params)
+
+
+@_openai_retry
+async def _acreate_completion(client, **params):
+    """Async variant of _create_completion."""
+    return await client.chat.completions.create(**params)
+
+
+@_openai_retry
+def _stream_json(client, **params) -> str:
+    """
+    Run a chat completion with stream=True and return the JSON text.
+    The response is read as it arrives and the stream is closed as soon as
+    the top-level array/object is complete.
+    """
+    scanner = _JSONScanner()
+    stream = client.chat.completions.create(stream=True, **params)
+    try:
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content and scanner.feed(chunk.choices[0].delta.content):
+                break
+    finally:
+        stream.close()
+    return scanner.text()
+
+
+@_openai_retry
+async def _astream_json(client, **params) -> str:
+    """Async variant of _stream_json."""
+    scanner = _JSONScanner()
+    stream = await client.chat.completions.create(stream=True, **params)
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content and scanner.feed(chunk.choices[0].delta.content):
+                break
+    finally:
+        await stream.close()
+    return scanner.text()
+
+
+def _score_messages(lead_data: dict) -> list:
     # Get language from lead or detect it
     lead_language = lead_data.get('language', 'en')
+    lang_instruction = SCORE_LANGUAGE_INSTRUCTIONS.get(lead_language, "Respond in English.")
     
-    # Language-specific instructions
-    language_instructions = {
-        'en': "Respond in English.",
-        'es': "Responde en español.",
-        'pt': "Responda em português.",
-        'fr': "Répondez en français."
-    }
-    
-    lang_instruction = language_instructions.get(lead_language, "Respond in English.")
-    
-    prompt = f"""Analyze this social media post and score the person as a potential B2B lead.
-{lang_instruction}
-
+    prompt = f"""{lang_instruction}
 The post appears to be in {lead_language.upper()}.
 
 Platform: {lead_data.get('platform', 'unknown')}
 Post Title: {lead_data.get('title', '')}
 Content: {lead_data.get('content', '')}
-Username: {lead_data.get('username', '')}
+Username: {lead_data.get('username', '')}"""
 
-Score this lead from 1-10 based on:
-- Urgency of their need (are they ready to buy now?)
-- Budget indicators (do they seem to have money to spend?)
-- Problem clarity (is their pain point clear?)
-- Decision maker likelihood (do they seem like they can make buying decisions?)
+    return [
+        {"role": "system", "content": SCORE_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _score_fallback(reason: str, lead_language: str = 'en') -> dict:
+    return dict(LeadScore(reason=reason).model_dump(), language=lead_language)
 
-Return JSON only (with responses in {lead_language.upper()} where applicable):
-{{
-  "score": <1-10>,
-  "urgency": <1-10>,
-  "budget_indicator": "low|medium|high|enterprise",
-  "problem_summary": "<one sentence summary of their main problem - in {lead_language.upper()}>",
-  "recommended_approach": "<how to approach them - in {lead_language.upper()}>",
-  "pain_points": ["<pain1>", "<pain2>"],
-  "language_detected": "{lead_language}",
-  "reason": "<why this score - in {lead_language.upper()}>"
-}}"""
+
+def _parse_score(content: str, lead_language: str) -> dict:
+    result = _validate_repairing(LeadScore, json_loads(_strip_fences(content)), "lead score").model_dump()
+    result['language'] = lead_language  # Ensure language is tracked
+    return result
+
+
+def score_lead_with_ai(lead_data: dict) -> dict:
+    """
+    Score a lead using OpenAI to determine its quality.
+    Detects language and responds in the same language.
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return _score_fallback('API not configured')
+    
+    client = _get_client()
+    lead_language = lead_data.get('language', 'en')
 
     try:
-        response = client.chat.completions.create(
+        response = _create_completion(
+            client,
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": f"You are a multilingual lead qualification expert. {lang_instruction} Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=_score_messages(lead_data),
             temperature=0.3,
             max_tokens=500
         )
         
-        content = response.choices[0].message.content.strip()
-        if content.startswith('```'):
-            content = content.split('```')[1]
-            if content.startswith('json'):
-                content = content[4:]
+        return _parse_score(response.choices[0].message.content, lead_language)
         
-        result = json.loads(content)
-        result['language'] = lead_language  # Ensure language is tracked
-        return result
+    except Exception as e:
+        print(f"Error scoring lead: {e}")
+        return _score_fallback(str(e), lead_language)
+
+
+async def ascore_lead_with_ai(lead_data: dict, semaphore: asyncio.Semaphore = None) -> dict:
+    """
+    Async variant of score_lead_with_ai, for scoring many leads concurrently.
+    Pass a shared semaphore to cap the number of in-flight requests.
+    """
+    if not os.getenv('OPENAI_API_KEY'):
+        return _score_fallback('API not configured')
+    
+    lead_language = lead_data.get('language', 'en')
+
+    try:
+        async with semaphore or contextlib.nullcontext(), _async_client_scope() as client:
+            response = await _acreate_completion(
+                client,
+                model="gpt-4o-mini",
+                messages=_score_messages(lead_data),
+                temperature=0.3,
+                max_tokens=500
+            )
+        
+        return _parse_score(response.choices[0].message.content, lead_language)
         
     except Exception as e:
         print(f"Error scoring lead: {e}")
-        return {'score': 5, 'reason': str(e), 'language': lead_language}
+        return _score_fallback(str(e), lead_language)
 
 
-def generate_email_with_ai(lead_data: dict, sender_info: dict = None) -> dict:
+def _batch_score_messages(leads: list) -> list:
+    entries = []
+    for idx, lead in enumerate(leads):
+        entries.append(f"""[idx {idx}] (language: {lead.get('language', 'en').upper()})
+Platform: {lead.get('platform', 'unknown')}
+Post Title: {lead.get('title', '')}
+Content: {lead.get('content', '')}
+Username: {lead.get('username', '')}""")
+
+    return [
+        {"role": "system", "content": BATCH_SCORE_SYSTEM_PROMPT},
+        {"role": "user", "content": "\n\n".join(entries)}
+    ]
+
+
+def _merge_batch_scores(leads: list, by_idx: dict) -> list:
+    results = []
+    for idx, lead in enumerate(leads):
+        lead_language = lead.get('language', 'en')
+        result = by_idx.get(idx)
+        if result is None:
+            results.append(_score_fallback('Missing from batch response', lead_language))
+        else:
+            result['language'] = lead_language  # Ensure language is tracked
+            results.append(result)
+    return results
+
+
+def _parse_batch_scores(content: str) -> dict:
+    by_idx = {}
+    for item in json_loads(_strip_fences(content)):
+        try:
+            score = _validate_repairing(BatchLeadScore, item, "batch lead score")
+        except ValidationError:
+            continue
+        by_idx[score.idx] = score.model_dump(exclude={'idx'})
+    return by_idx
+
+
+def score_leads_batch_with_ai(leads: list) -> list:
     """
-    Generate a personalized cold email for a lead using OpenAI.
-    Respects the lead's language - writes email in the same language as the post.
+    Score several leads with a single OpenAI call.
+    Returns one score dict per input lead, in the same order (same shape as
+    score_lead_with_ai). Leads the model skips fall back to a neutral score.
     """
+    if not leads:
+        return []
+    
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
-        return {'subject': '', 'body': '', 'error': 'API not configured'}
+        return [_score_fallback('API not configured', lead.get('language', 'en')) for lead in leads]
     
-    client = OpenAI(api_key=api_key)
+    client = _get_client()
+
+    try:
+        content = _stream_json(
+            client,
+            model="gpt-4o-mini",
+            messages=_batch_score_messages(leads),
+            temperature=0.3,
+            max_tokens=min(4000, 300 * len(leads) + 200)
+        )
+        by_idx = _parse_batch_scores(content)
+        
+    except Exception as e:
+        print(f"Error scoring leads: {e}")
+        by_idx = {}
     
+    return _merge_batch_scores(leads, by_idx)
+
+
+async def ascore_leads_batch_with_ai(leads: list, semaphore: asyncio.Semaphore = None) -> list:
+    """Async variant of score_leads_batch_with_ai."""
+    if not leads:
+        return []
+    
+    if not os.getenv('OPENAI_API_KEY'):
+        return [_score_fallback('API not configured', lead.get('language', 'en')) for lead in leads]
+
+    try:
+        async with semaphore or contextlib.nullcontext(), _async_client_scope() as client:
+            content = await _astream_json(
+                client,
+                model="gpt-4o-mini",
+                messages=_batch_score_messages(leads),
+                temperature=0.3,
+                max_tokens=min(4000, 300 * len(leads) + 200)
+            )
+        by_idx = _parse_batch_scores(content)
+        
+    except Exception as e:
+        print(f"Error scoring leads: {e}")
+        by_idx = {}
+    
+    return _merge_batch_scores(leads, by_idx)
+
+
+async def score_leads_concurrently(leads: list, batch_size: int = SCORE_BATCH_SIZE,
+                                   max_concurrency: int = MAX_CONCURRENT_REQUESTS) -> list:
+    """
+    Score leads in chunks of `batch_size`, with up to `max_concurrency`
+    chunk requests in flight at once. Results keep the input order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    chunks = [leads[i:i + batch_size] for i in range(0, len(leads), batch_size)]
+    async with _async_client_scope():
+        scored = await asyncio.gather(*[ascore_leads_batch_with_ai(chunk, semaphore) for chunk in chunks])
+    return [score for chunk_scores in scored for score in chunk_scores]
+
+
+def _email_messages(lead_data: dict, sender_info: dict = None) -> list:
     sender_name = sender_info.get('name', 'Alex') if sender_info else 'Alex'
     sender_company = sender_info.get('company', 'Lead Finder AI') if sender_info else 'Lead Finder AI'
     
     # Get lead's language
     lead_language = lead_data.get('language', 'en')
+    lang_instruction = EMAIL_LANGUAGE_INSTRUCTIONS.get(lead_language, EMAIL_LANGUAGE_INSTRUCTIONS['en'])
     
-    # Language-specific instructions
-    language_config = {
-        'en': {
-            'instruction': "Write the email in ENGLISH.",
-            'system': "You are an expert at writing personalized cold emails that get responses. Write in English.",
-        },
-        'es': {
-            'instruction': "Escribe el email EN ESPAÑOL. El lead habla español.",
-            'system': "Eres un experto escribiendo emails fríos personalizados que consiguen respuestas. Escribe en español.",
-        },
-        'pt': {
-            'instruction': "Escreva o email EM PORTUGUÊS. O lead fala português.",
-            'system': "Você é um especialista em escrever emails frios personalizados que recebem respostas. Escreva em português.",
-        },
-        'fr': {
-            'instruction': "Écrivez l'email EN FRANÇAIS. Le lead parle français.",
-            'system': "Vous êtes un expert en rédaction d'emails à froid personnalisés qui obtiennent des réponses. Écrivez en français.",
-        }
-    }
-    
-    lang_config = language_config.get(lead_language, language_config['en'])
-    
-    prompt = f"""Write a personalized cold email to this potential lead.
-{lang_config['instruction']}
+    prompt = f"""Sender: {sender_name} from {sender_company}
 
 The lead's post (in {lead_language.upper()}):
 Platform: {lead_data.get('platform', '')}
@@ -214,42 +683,63 @@ Title: {lead_data.get('title', '')}
 Content: {lead_data.get('content', '')}
 Their pain points: {lead_data.get('pain_points', [])}
 
-Write an email that:
-1. References their specific problem (don't be generic)
-2. Shows empathy for their situation
-3. Briefly mentions how you can help
-4. Has a soft call-to-action (not pushy)
-5. Feels human, not like a template
-6. Is short (under 150 words)
-7. IS WRITTEN IN {lead_language.upper()} - VERY IMPORTANT!
+{lang_instruction}"""
 
-Sender: {sender_name} from {sender_company}
+    return [
+        {"role": "system", "content": EMAIL_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
 
-Return JSON (with subject and body in {lead_language.upper()}):
-{{
-  "subject": "<catchy but professional subject line in {lead_language.upper()}>",
-  "body": "<the email body in {lead_language.upper()}>",
-  "language": "{lead_language}"
-}}"""
+
+def generate_email_with_ai(lead_data: dict, sender_info: dict = None) -> dict:
+    """
+    Generate a personalized cold email for a lead using OpenAI.
+    Respects the lead's language - writes email in the same language as the post.
+    """
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return {'subject': '', 'body': '', 'error': 'API not configured'}
+    
+    client = _get_client()
+    lead_language = lead_data.get('language', 'en')
 
     try:
-        response = client.chat.completions.create(
+        response = _create_completion(
+            client,
             model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": lang_config['system'] + " Always respond with valid JSON only."},
-                {"role": "user", "content": prompt}
-            ],
+            messages=_email_messages(lead_data, sender_info),
             temperature=0.7,
             max_tokens=600
         )
         
-        content = response.choices[0].message.content.strip()
-        if content.startswith('```'):
-            content = content.split('```')[1]
-            if content.startswith('json'):
-                content = content[4:]
+        result = json_loads(_strip_fences(response.choices[0].message.content))
+        result['language'] = lead_language  # Ensure language is tracked
+        return result
         
-        result = json.loads(content)
+    except Exception as e:
+        print(f"Error generating email: {e}")
+        return {'subject': '', 'body': '', 'error': str(e), 'language': lead_language}
+
+
+async def agenerate_email_with_ai(lead_data: dict, sender_info: dict = None,
+                                  semaphore: asyncio.Semaphore = None) -> dict:
+    """Async variant of generate_email_with_ai."""
+    if not os.getenv('OPENAI_API_KEY'):
+        return {'subject': '', 'body': '', 'error': 'API not configured'}
+    
+    lead_language = lead_data.get('language', 'en')
+
+    try:
+        async with semaphore or contextlib.nullcontext(), _async_client_scope() as client:
+            response = await _acreate_completion(
+                client,
+                model="gpt-4o-mini",
+                messages=_email_messages(lead_data, sender_info),
+                temperature=0.7,
+                max_tokens=600
+            )
+        
+        result = json_loads(_strip_fences(response.choices[0].message.content))
         result['language'] = lead_language  # Ensure language is tracked
         return result
         
@@ -258,15 +748,167 @@ Return JSON (with subject and body in {lead_language.upper()}):
         return {'subject': '', 'body': '', 'error': str(e), 'language': lead_language}
 
 
-def run_ai_pipeline(user_id: int, keywords: list, num_leads: int = 5):
+def _score_and_email_messages(lead_data: dict, sender_info: dict = None) -> list:
+    sender_name = sender_info.get('name', 'Alex') if sender_info else 'Alex'
+    sender_company = sender_info.get('company', 'Lead Finder AI') if sender_info else 'Lead Finder AI'
+    
+    lead_language = lead_data.get('language', 'en')
+    score_instruction = SCORE_LANGUAGE_INSTRUCTIONS.get(lead_language, "Respond in English.")
+    email_instruction = EMAIL_LANGUAGE_INSTRUCTIONS.get(lead_language, EMAIL_LANGUAGE_INSTRUCTIONS['en'])
+    
+    prompt = f"""Sender: {sender_name} from {sender_company}
+
+The lead's post (in {lead_language.upper()}):
+Platform: {lead_data.get('platform', 'unknown')}
+Title: {lead_data.get('title', '')}
+Content: {lead_data.get('content', '')}
+Username: {lead_data.get('username', '')}
+Their pain points: {lead_data.get('pain_points', [])}
+
+{score_instruction} {email_instruction}"""
+
+    return [
+        {"role": "system", "content": SCORE_AND_EMAIL_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _split_score_and_email(content: str, lead_language: str) -> dict:
+    result = json_loads(_strip_fences(content))
+    try:
+        score = _validate_repairing(LeadScore, result.get('score'), "lead score")
+        score = dict(score.model_dump(), language=lead_language)
+    except ValidationError as e:
+        score = _score_fallback(str(e), lead_language)
+    email = result.get('email') if isinstance(result.get('email'), dict) else {'subject': '', 'body': ''}
+    email['language'] = lead_language  # Ensure language is tracked
+    return {'score': score, 'email': email}
+
+
+def _score_and_email_fallback(reason: str, lead_language: str) -> dict:
+    return {
+        'score': _score_fallback(reason, lead_language),
+        'email': {'subject': '', 'body': '', 'error': reason, 'language': lead_language}
+    }
+
+
+def score_and_email_with_ai(lead_data: dict, sender_info: dict = None) -> dict:
+    """
+    Score a lead and write its cold email in one OpenAI call.
+    Returns {'score': <score_lead_with_ai result>, 'email': <generate_email_with_ai result>}.
+    """
+    lead_language = lead_data.get('language', 'en')
+    if not os.getenv('OPENAI_API_KEY'):
+        return _score_and_email_fallback('API not configured', lead_language)
+
+    try:
+        response = _create_completion(
+            _get_client(),
+            model="gpt-4o-mini",
+            messages=_score_and_email_messages(lead_data, sender_info),
+            temperature=0.5,
+            max_tokens=1000
+        )
+        return _split_score_and_email(response.choices[0].message.content, lead_language)
+        
+    except Exception as e:
+        print(f"Error scoring/emailing lead: {e}")
+        return _score_and_email_fallback(str(e), lead_language)
+
+
+async def ascore_and_email_with_ai(lead_data: dict, sender_info: dict = None,
+                                   semaphore: asyncio.Semaphore = None) -> dict:
+    """Async variant of score_and_email_with_ai."""
+    lead_language = lead_data.get('language', 'en')
+    if not os.getenv('OPENAI_API_KEY'):
+        return _score_and_email_fallback('API not configured', lead_language)
+
+    try:
+        async with semaphore or contextlib.nullcontext(), _async_client_scope() as client:
+            response = await _acreate_completion(
+                client,
+                model="gpt-4o-mini",
+                messages=_score_and_email_messages(lead_data, sender_info),
+                temperature=0.5,
+                max_tokens=1000
+            )
+        return _split_score_and_email(response.choices[0].message.content, lead_language)
+        
+    except Exception as e:
+        print(f"Error scoring/emailing lead: {e}")
+        return _score_and_email_fallback(str(e), lead_language)
+
+
+async def score_and_email_concurrently(leads: list, sender_info: dict = None,
+                                       max_concurrency: int = MAX_CONCURRENT_REQUESTS) -> list:
+    """Fused score + email for every lead, up to `max_concurrency` requests at once."""
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async with _async_client_scope():
+        return await asyncio.gather(*[ascore_and_email_with_ai(lead, sender_info, semaphore) for lead in leads])
+
+
+def _save_leads(user_id: int, raw_leads: list, scores: list, emails: list = None) -> list:
+    """
+    Create Lead rows for scored leads and bump the user's lead counter.
+    All rows go in one multi-row INSERT and the counter is incremented in SQL,
+    so the whole save is a single transaction with two statements.
+    """
+    from sqlalchemy import insert, update, func
+    from models import db, Lead, User
+    
+    now = datetime.utcnow()
+    rows = []
+    
+    for i, (raw_lead, score_data) in enumerate(zip(raw_leads, scores)):
+        print(f"\n→ @{raw_lead.get('username', 'unknown')}")
+        email_data = emails[i] if emails else {}
+        
+        # Only use fields that exist in the model. Leads and scores are
+        # validated (GeneratedLead / LeadScore), so every key is present.
+        rows.append(dict(
+            user_id=user_id,
+            platform=raw_lead['platform'],
+            username=raw_lead['username'],
+            title=raw_lead['title'],
+            content=raw_lead['content'],
+            post_url=raw_lead.get('post_url', ''),
+            score=score_data['score'],
+            urgency=score_data['urgency'],
+            budget_indicator=score_data['budget_indicator'],
+            problem_summary=score_data['problem_summary'],
+            email_subject=email_data.get('subject') or None,
+            email_generated=email_data.get('body') or None,
+            source_created_at=now,
+            source_type='ai_generated',  # Mark as AI-generated
+            status='new'
+        ))
+        print(f"  ✓ Score: {score_data['score']}/10 - {score_data['reason'][:50]}")
+    
+    if not rows:
+        return []
+    
+    created_leads = db.session.scalars(insert(Lead).returning(Lead), rows).all()
+    
+    # Update user stats (atomic increment, no read-modify-write)
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(leads_found_count=func.coalesce(User.leads_found_count, 0) + len(rows))
+    )
+    db.session.commit()
+    
+    return created_leads
+
+
+def run_ai_pipeline(user_id: int, keywords: list, num_leads: int = 5,
+                    generate_emails: bool = False, sender_info: dict = None):
     """
     Run the complete AI-powered lead generation pipeline
     1. Generate leads with AI
-    2. Score each lead
+    2. Score all leads (batched, concurrent requests), or with generate_emails
+       score each lead and write its email in one fused request
     3. Store in database
     """
-    from models import db, Lead, User
-    
     print(f"\n{'='*50}")
     print(f"🤖 Starting AI Lead Generation Pipeline")
     print(f"{'='*50}")
@@ -281,44 +923,139 @@ def run_ai_pipeline(user_id: int, keywords: list, num_leads: int = 5):
         print("❌ No leads generated")
         return []
     
-    created_leads = []
+    # Step 2: Score leads (batched requests, sent concurrently)
+    emails = None
+    if generate_emails:
+        print(f"\n→ Scoring and writing emails for {len(raw_leads)} leads...")
+        results = asyncio.run(score_and_email_concurrently(raw_leads, sender_info))
+        scores = [r['score'] for r in results]
+        emails = [r['email'] for r in results]
+    else:
+        print(f"\n→ Scoring {len(raw_leads)} leads...")
+        scores = asyncio.run(score_leads_concurrently(raw_leads))
     
-    for raw_lead in raw_leads:
-        # Step 2: Score the lead
-        print(f"\n→ Scoring: @{raw_lead.get('username', 'unknown')}")
-        score_data = score_lead_with_ai(raw_lead)
-        
-        # Step 3: Create lead in database (only use fields that exist in the model)
-        lead = Lead(
-            user_id=user_id,
-            platform=raw_lead.get('platform', 'unknown'),
-            username=raw_lead.get('username', 'unknown'),
-            title=raw_lead.get('title', ''),
-            content=raw_lead.get('content', ''),
-            post_url=raw_lead.get('post_url', ''),
-            score=score_data.get('score', 5),
-            urgency=score_data.get('urgency', 5),
-            budget_indicator=score_data.get('budget_indicator', 'medium'),
-            problem_summary=score_data.get('problem_summary', ''),
-            source_created_at=datetime.utcnow(),
-            source_type='ai_generated',  # Mark as AI-generated
-            status='new'
-        )
-        
-        db.session.add(lead)
-        created_leads.append(lead)
-        print(f"  ✓ Score: {score_data.get('score', 5)}/10 - {score_data.get('reason', '')[:50]}")
+    # Step 3: Store in database
+    created_leads = _save_leads(user_id, raw_leads, scores, emails)
     
-    db.session.commit()
+    print(f"\n{'='*50}")
+    print(f"✅ Pipeline complete! Created {len(created_leads)} leads")
+    print(f"{'='*50}\n")
     
-    # Update user stats
-    user = User.query.get(user_id)
-    if user:
-        user.leads_found_count = (user.leads_found_count or 0) + len(created_leads)
-        db.session.commit()
+    return created_leads
+
+
+def _batch_request(custom_id: str, messages: list, **params) -> dict:
+    """One JSONL line for the OpenAI Batch API (chat completions endpoint)."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": {"model": "gpt-4o-mini", "messages": messages, **params}
+    }
+
+
+def submit_batch(requests: list) -> str:
+    """Upload requests as JSONL and start a 24h batch. Returns the batch id."""
+    client = _get_client()
+    payload = b"\n".join(json_dumps(r) for r in requests)
+    batch_file = client.files.create(file=("lead_pipeline_batch.jsonl", payload), purpose="batch")
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    return batch.id
+
+
+def wait_for_batch(batch_id: str, poll_interval: int = 60) -> dict:
+    """
+    Poll until the batch finishes and return {custom_id: message content}.
+    Requests that failed inside the batch are left out.
+    """
+    client = _get_client()
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            break
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}'")
+        time.sleep(poll_interval)
     
+    results = {}
+    if not batch.output_file_id:
+        return results
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        item = json_loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") != 200:
+            continue
+        results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    return results
+
+
+def _parse_batch_result(content: str, lead_language: str) -> dict:
+    if content is None:
+        return _score_and_email_fallback('Missing from batch output', lead_language)
+    try:
+        return _split_score_and_email(content, lead_language)
+    except (ValueError, AttributeError) as e:  # malformed JSON or wrong shape
+        return _score_and_email_fallback(str(e), lead_language)
+
+
+def run_ai_pipeline_batch(user_id: int, keywords: list, num_leads: int = 5,
+                          sender_info: dict = None, poll_interval: int = 60):
+    """
+    Non-interactive variant of run_ai_pipeline for cron/background jobs.
+    The fused score + email request for every lead goes through the OpenAI Batch
+    API (half the cost of real-time calls and outside the per-minute rate
+    limits). Blocks until the batch completes, which can take up to 24h.
+    """
     print(f"\n{'='*50}")
-    print(f"✅ Pipeline complete! Created {len(created_leads)} leads")
+    print(f"🤖 Starting AI Lead Generation Pipeline (Batch API)")
+    print(f"{'='*50}")
+    print(f"User ID: {user_id}")
+    print(f"Keywords: {keywords}")
+    print(f"Generating {num_leads} leads...")
+    
+    if not os.getenv('OPENAI_API_KEY'):
+        print("Error: OPENAI_API_KEY not configured")
+        return []
+    
+    # Step 1: Generate leads
+    raw_leads = generate_leads_with_ai(keywords, num_leads)
+    
+    if not raw_leads:
+        print("❌ No leads generated")
+        return []
+    
+    # Step 2: One fused score + email request per lead
+    requests = [
+        _batch_request(f"lead:{i}", _score_and_email_messages(raw_lead, sender_info), temperature=0.5, max_tokens=1000)
+        for i, raw_lead in enumerate(raw_leads)
+    ]
+    
+    try:
+        batch_id = submit_batch(requests)
+        print(f"\n→ Submitted batch {batch_id} ({len(requests)} requests), waiting...")
+        results = wait_for_batch(batch_id, poll_interval)
+    except Exception as e:
+        print(f"❌ Batch failed: {e}")
+        return []
+    
+    # Step 3: Map results back to leads by custom_id
+    scores, emails = [], []
+    for i, raw_lead in enumerate(raw_leads):
+        result = _parse_batch_result(results.get(f"lead:{i}"), raw_lead.get('language', 'en'))
+        scores.append(result['score'])
+        emails.append(result['email'])
+    
+    # Step 4: Store in database
+    created_leads = _save_leads(user_id, raw_leads, scores, emails)
+    
+    print(f"\n{'='*50}")
+    print(f"✅ Batch pipeline complete! Created {len(created_leads)} leads")
     print(f"{'='*50}\n")
     
     return created_leads
@@ -11,15 +11,22 @@ Features:
 This enables real professional email analytics at $0 cost.
 """
 import os
+import re
 import sys
 import uuid
 import hashlib
 import logging
+from bisect import bisect_left
 from datetime import datetime
-from urllib.parse import urlencode, quote
-from typing import Dict, Optional
+from urllib.parse import quote_plus
+from typing import ClassVar, Dict, Optional, Tuple
 from dataclasses import dataclass
 
+try:
+    import numpy as np
+except ImportError:  # only needed for TrackingAnalytics.get_benchmark_comparison_bulk
+    np = None  # type: ignore[assignment]
+
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 logging.basicConfig(level=logging.INFO)
@@ -38,33 +45,54 @@ class TrackingEvent:
     link_url: Optional[str] = None  # For click events
 
 
+# 1x1 transparent GIF (smallest valid image)
+_PIXEL_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff'
+    b'\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00'
+    b'\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
 class EmailTracker:
     """
     Handles email tracking via pixel and redirect links.
     """
     
-    # 1x1 transparent GIF (smallest valid image)
-    TRACKING_PIXEL = (
-        b'GIF89a\x01\x00\x01\x00\x80\x00\x00\xff\xff\xff'
-        b'\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00'
-        b'\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+    TRACKING_PIXEL: ClassVar[bytes] = _PIXEL_GIF
+    
+    # Headers for serving TRACKING_PIXEL, built once at import. The open
+    # endpoint is the hottest URL of a campaign, so it only passes these along.
+    PIXEL_RESPONSE_HEADERS: ClassVar[Tuple[Tuple[str, str], ...]] = (
+        ('Content-Type', 'image/gif'),
+        ('Content-Length', str(len(_PIXEL_GIF))),
+        ('Cache-Control', 'no-cache, no-store, must-revalidate'),
+        ('Pragma', 'no-cache'),
+        ('Expires', '0'),
     )
     
-    def __init__(self, base_url: str = None):
+    _HREF_RE: ClassVar[re.Pattern] = re.compile(r'href=["\']([^"\']+)["\']')
+    _BODY_RE: ClassVar[re.Pattern] = re.compile(r'</body>', re.IGNORECASE)
+    _URL_RE: ClassVar[re.Pattern] = re.compile(r'(https?://[^\s<>"]+)')
+    
+    def __init__(self, base_url: Optional[str] = None):
         """
         Args:
             base_url: Base URL of the application (e.g., https://yourdomain.com)
         """
         self.base_url = base_url or os.getenv('APP_URL', 'http://localhost:5000')
+        self._click_prefix = f"{self.base_url}/track/click/"
     
     def generate_tracking_id(self, lead_id: int, email_position: int = 1) -> str:
         """
         Generate a unique tracking ID for an email.
-        Uses a hash to prevent guessing.
+        Uses a keyed BLAKE2b hash to prevent guessing (24 hex chars).
         """
         secret = os.getenv('SECRET_KEY', 'default-secret-key')
-        unique_string = f"{lead_id}:{email_position}:{secret}:{uuid.uuid4()}"
-        return hashlib.sha256(unique_string.encode()).hexdigest()[:24]
+        return hashlib.blake2b(
+            f"{lead_id}:{email_position}:".encode() + uuid.uuid4().bytes,
+            key=secret.encode()[:64],
+            digest_size=12
+        ).hexdigest()
     
     def generate_pixel_url(self, lead_id: int, tracking_id: str) -> str:
         """
@@ -90,7 +118,7 @@ class EmailTracker:
         original_url: str,
         lead_id: int,
         tracking_id: str,
-        link_id: str = None
+        link_id: Optional[str] = None
     ) -> str:
         """
         Wrap a link in a tracking redirect.
@@ -99,12 +127,8 @@ class EmailTracker:
         https://yourdomain.com/track/click/abc123?url=https://...&lid=1
         """
         link_id = link_id or uuid.uuid4().hex[:8]
-        params = urlencode({
-            'url': original_url,
-            'lid': lead_id,
-            'lnk': link_id
-        })
-        return f"{self.base_url}/track/click/{tracking_id}?{params}"
+        # lid (int) and lnk (hex) never need quoting
+        return f"{self._click_prefix}{tracking_id}?url={quote_plus(original_url)}&lid={lead_id}&lnk={link_id}"
     
     def inject_tracking_into_html(
         self,
@@ -115,37 +139,34 @@ class EmailTracker:
         """
         Inject tracking pixel and wrap links in HTML email.
         """
-        import re
+        # Wrap all links (skipped entirely when the HTML has none). The click
+        # URL prefix is the same for every link in this email, so only the
+        # per-link tail is formatted in the callback.
+        if 'href=' in html_content:
+            prefix = f"{self._click_prefix}{tracking_id}?url="
+            suffix = f"&lid={lead_id}&lnk="
+            
+            def replace_link(match: re.Match) -> str:
+                original_url = match.group(1)
+                # Don't track mailto: or internal links
+                if original_url.startswith(('mailto:', '#', 'javascript:')):
+                    return match.group(0)
+                return f'href="{prefix}{quote_plus(original_url)}{suffix}{uuid.uuid4().hex[:8]}"'
+            
+            html_content = self._HREF_RE.sub(replace_link, html_content)
         
-        # Add tracking pixel before </body> or at end
+        # Add tracking pixel before the closing </body>, or at the end.
+        # Plain str.rfind covers the usual lowercase tag; the regex is only
+        # needed for other casings.
         pixel_html = self.generate_pixel_html(lead_id, tracking_id)
         
-        if '</body>' in html_content.lower():
-            html_content = re.sub(
-                r'</body>',
-                f'{pixel_html}</body>',
-                html_content,
-                flags=re.IGNORECASE
-            )
-        else:
-            html_content += pixel_html
-        
-        # Wrap all links
-        def replace_link(match):
-            original_url = match.group(1)
-            # Don't track mailto: or internal links
-            if original_url.startswith(('mailto:', '#', 'javascript:')):
-                return match.group(0)
-            tracked_url = self.generate_tracked_link(original_url, lead_id, tracking_id)
-            return f'href="{tracked_url}"'
-        
-        html_content = re.sub(
-            r'href=["\']([^"\']+)["\']',
-            replace_link,
-            html_content
-        )
-        
-        return html_content
+        idx = html_content.rfind('</body>')
+        if idx < 0:
+            for match in self._BODY_RE.finditer(html_content):
+                idx = match.start()
+        if idx < 0:
+            return html_content + pixel_html
+        return html_content[:idx] + pixel_html + html_content[idx:]
     
     def inject_tracking_into_text(
         self,
@@ -157,15 +178,11 @@ class EmailTracker:
         For plain text emails, we can only track clicks, not opens.
         Wraps URLs in tracking redirects.
         """
-        import re
-        
-        url_pattern = r'(https?://[^\s<>"]+)'
-        
-        def replace_url(match):
+        def replace_url(match: re.Match) -> str:
             original_url = match.group(1)
             return self.generate_tracked_link(original_url, lead_id, tracking_id)
         
-        return re.sub(url_pattern, replace_url, text_content)
+        return self._URL_RE.sub(replace_url, text_content)
 
 
 class TrackingAnalytics:
@@ -194,6 +211,12 @@ class TrackingAnalytics:
             return 0.0
         return round((replied / sent) * 100, 2)
     
+    # Industry benchmarks: (value, thresholds). A rate above the first
+    # threshold is 'at' benchmark, above the second is 'above'.
+    OPEN_RATE_BENCHMARK: ClassVar[Tuple[float, Tuple[float, float]]] = (20.0, (15.0, 20.0))
+    CLICK_RATE_BENCHMARK: ClassVar[Tuple[float, Tuple[float, float]]] = (3.5, (2.0, 3.5))
+    BENCHMARK_STATUSES: ClassVar[Tuple[str, str, str]] = ('below', 'at', 'above')
+    
     @staticmethod
     def get_benchmark_comparison(open_rate: float, click_rate: float) -> Dict:
         """
@@ -204,18 +227,44 @@ class TrackingAnalytics:
         - Click rate: 2-5%
         - Reply rate: 1-5%
         """
+        statuses = TrackingAnalytics.BENCHMARK_STATUSES
+        open_benchmark, open_thresholds = TrackingAnalytics.OPEN_RATE_BENCHMARK
+        click_benchmark, click_thresholds = TrackingAnalytics.CLICK_RATE_BENCHMARK
         return {
             'open_rate': {
                 'value': open_rate,
-                'benchmark': 20.0,
-                'status': 'above' if open_rate > 20 else 'at' if open_rate > 15 else 'below'
+                'benchmark': open_benchmark,
+                'status': statuses[bisect_left(open_thresholds, open_rate)]
             },
             'click_rate': {
                 'value': click_rate,
-                'benchmark': 3.5,
-                'status': 'above' if click_rate > 3.5 else 'at' if click_rate > 2 else 'below'
+                'benchmark': click_benchmark,
+                'status': statuses[bisect_left(click_thresholds, click_rate)]
             }
         }
+    
+    @staticmethod
+    def get_benchmark_comparison_bulk(open_rates, click_rates) -> Dict:
+        """
+        Vectorised get_benchmark_comparison for many campaigns at once
+        (e.g. a dashboard). Takes sequences/arrays of rates and returns the
+        same structure with arrays for 'value' and 'status'. Requires NumPy.
+        """
+        if np is None:
+            raise RuntimeError("get_benchmark_comparison_bulk requires numpy")
+        statuses = np.array(TrackingAnalytics.BENCHMARK_STATUSES)
+        result = {}
+        for key, rates, (benchmark, thresholds) in (
+            ('open_rate', open_rates, TrackingAnalytics.OPEN_RATE_BENCHMARK),
+            ('click_rate', click_rates, TrackingAnalytics.CLICK_RATE_BENCHMARK),
+        ):
+            values = np.asarray(rates, dtype=float)
+            result[key] = {
+                'value': values,
+                'benchmark': benchmark,
+                'status': statuses[np.searchsorted(thresholds, values, side='left')]
+            }
+        return result
 
 
 # Flask routes for tracking endpoints
@@ -240,13 +289,12 @@ def track_open(tracking_id):
     except Exception as e:
         logger.error(f"Track open error: {e}")
     
-    # Return 1x1 transparent GIF
-    response = make_response(EmailTracker.TRACKING_PIXEL)
-    response.headers['Content-Type'] = 'image/gif'
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+    # Return 1x1 transparent GIF (static bytes + precomputed headers)
+    return Response(
+        EmailTracker.TRACKING_PIXEL,
+        headers=EmailTracker.PIXEL_RESPONSE_HEADERS,
+        direct_passthrough=True
+    )
 
 
 @app.route('/track/click/<tracking_id>')
@@ -288,7 +336,7 @@ ON leads(email_tracking_id);
 """
 
 
-def get_tracker(base_url: str = None) -> EmailTracker:
+def get_tracker(base_url: Optional[str] = None) -> EmailTracker:
     """Get email tracker instance"""
     return EmailTracker(base_url)
 
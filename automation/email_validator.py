@@ -12,13 +12,21 @@ Validation Levels:
 Strategy: $0 cost validation using DNS lookups and pattern matching.
 For production at scale, consider integrating with ZeroBounce, Hunter.io, etc.
 """
+import os
 import re
+import asyncio
+import dns.name
 import dns.resolver
+import dns.asyncresolver
 import socket
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional, Tuple
 from functools import lru_cache
+from typing import Optional, Tuple
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,7 +55,154 @@ ROLE_BASED_PREFIXES = {
 }
 
 
-@dataclass
+
+def _load_domain_list(path: str) -> set:
+    """Read a newline-separated domain list (one domain per line, '#' comments)"""
+    with open(path, encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')}
+
+
+# Optional full public disposable-domain list (100k+ entries) merged into the
+# built-in one. Membership stays a frozenset probe: in CPython a single
+# set lookup is cheaper than the k hashes a Bloom prefilter would add.
+DISPOSABLE_DOMAINS_FILE = os.getenv('DISPOSABLE_DOMAINS_FILE')
+if DISPOSABLE_DOMAINS_FILE:
+    try:
+        DISPOSABLE_DOMAINS |= _load_domain_list(DISPOSABLE_DOMAINS_FILE)
+    except OSError as e:
+        logger.warning(f"Could not load disposable domains from {DISPOSABLE_DOMAINS_FILE}: {e}")
+
+# Normalized once at import so lookups can take already-lowercased input as-is
+DISPOSABLE_DOMAINS = frozenset(d.lower() for d in DISPOSABLE_DOMAINS)
+ROLE_BASED_PREFIXES = frozenset(p.lower() for p in ROLE_BASED_PREFIXES)
+
+
+def _domain_from_validated(email: str) -> str:
+    """Domain of an address that already passed validate_syntax (one '@', lowercased)"""
+    return email[email.index('@') + 1:]
+
+
+def is_disposable_domain(domain: str) -> bool:
+    """Check an already-lowercased domain against the disposable list"""
+    return domain in DISPOSABLE_DOMAINS
+
+
+def is_role_based_local(local_part: str) -> bool:
+    """Check an already-lowercased local part against the role-based prefixes"""
+    # A single frozenset probe; a max-length pre-check or length-bucketed
+    # sets measured slower in CPython than hashing a short local part.
+    return local_part in ROLE_BASED_PREFIXES
+
+
+# Longest delegated TLD is 24 characters; anything longer can't resolve
+MAX_TLD_LENGTH = 24
+
+# Upper bound on in-flight DNS queries during validate_batch
+MAX_CONCURRENT_DNS = 64
+# Upper bound on worker threads for validate_batch_threaded
+MAX_DNS_THREADS = 32
+
+DEFAULT_DNS_TIMEOUT = 5
+
+# Resolvers for the default timeout, shared by every validator (built lazily
+# so importing this module never reads resolv.conf)
+_default_resolvers = None
+
+
+def _build_resolvers(timeout: int) -> tuple:
+    """Create a (sync, async) resolver pair with the given timeout"""
+    resolver = dns.resolver.Resolver()
+    resolver.timeout = timeout
+    resolver.lifetime = timeout
+    async_resolver = dns.asyncresolver.Resolver()
+    async_resolver.timeout = timeout
+    async_resolver.lifetime = timeout
+    return resolver, async_resolver
+
+
+def _get_default_resolvers() -> tuple:
+    """Get or create the shared default resolver pair"""
+    global _default_resolvers
+    if _default_resolvers is None:
+        _default_resolvers = _build_resolvers(DEFAULT_DNS_TIMEOUT)
+    return _default_resolvers
+
+
+# Parsed dns.name.Name per domain, so cache misses don't re-parse the text
+_dns_name = lru_cache(maxsize=4096)(dns.name.from_text)
+
+# Process-wide MX cache: domain -> (has_mx, reason, expires_at).
+# Domains with mail records are kept longer than misses; timeouts and other
+# resolver errors are not cached at all.
+MX_CACHE_POSITIVE_TTL = 3600
+MX_CACHE_NEGATIVE_TTL = 300
+MX_CACHE_MAX_SIZE = 10_000
+_TRANSIENT_MX_REASONS = ("DNS timeout", "DNS error")
+_mx_cache: "OrderedDict[str, Tuple[bool, str, float]]" = OrderedDict()
+_mx_cache_lock = threading.Lock()
+
+
+def _mx_cache_get(domain: str) -> Optional[Tuple[bool, str]]:
+    """Return a cached (has_mx, reason) for domain, or None if missing/expired"""
+    with _mx_cache_lock:
+        entry = _mx_cache.get(domain)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[2]:
+            del _mx_cache[domain]
+            return None
+        _mx_cache.move_to_end(domain)
+        return entry[0], entry[1]
+
+
+def _mx_cache_put(domain: str, result: Tuple[bool, str]) -> None:
+    """Cache an MX lookup result with the TTL matching its outcome"""
+    has_mx, reason = result
+    if not has_mx and reason.startswith(_TRANSIENT_MX_REASONS):
+        return
+    ttl = MX_CACHE_POSITIVE_TTL if has_mx else MX_CACHE_NEGATIVE_TTL
+    with _mx_cache_lock:
+        _mx_cache[domain] = (has_mx, reason, time.monotonic() + ttl)
+        _mx_cache.move_to_end(domain)
+        while len(_mx_cache) > MX_CACHE_MAX_SIZE:
+            _mx_cache.popitem(last=False)
+
+
+
+class _MXFlight:
+    """An in-progress lookup other callers can wait on instead of re-querying"""
+    __slots__ = ('event', 'result')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+
+
+# domain -> lookup currently being resolved (guarded by _mx_cache_lock)
+_mx_inflight: "dict[str, _MXFlight]" = {}
+
+
+def _mx_claim(domain: str) -> Tuple[_MXFlight, bool]:
+    """Join the in-flight lookup for domain, or start one. Returns (flight, is_leader)"""
+    with _mx_cache_lock:
+        flight = _mx_inflight.get(domain)
+        if flight is not None:
+            return flight, False
+        flight = _mx_inflight[domain] = _MXFlight()
+        return flight, True
+
+
+def _mx_release(domain: str, flight: _MXFlight, result: Optional[Tuple[bool, str]]) -> None:
+    """Publish the leader's result (if any), cache it and wake waiting callers"""
+    if result is not None:
+        _mx_cache_put(domain, result)
+    flight.result = result
+    with _mx_cache_lock:
+        _mx_inflight.pop(domain, None)
+    flight.event.set()
+
+
+@dataclass(slots=True)
 class EmailValidationResult:
     """Result of email validation"""
     email: str
@@ -80,53 +235,83 @@ class EmailValidator:
     Uses DNS lookups and pattern matching for $0 cost validation.
     """
     
-    # RFC 5322 compliant email regex
+    # RFC 5322 compliant email regex. Possessive quantifiers (Python 3.11+)
+    # stop the engine from re-trying label splits on inputs that can't match.
     EMAIL_REGEX = re.compile(
-        r"^[a-zA-Z0-9.!#$%&'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}"
-        r"[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$"
+        r"^[a-zA-Z0-9.!#$%&'*+/=?^_`{|}~-]++@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}"
+        r"[a-zA-Z0-9])?+(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?+)*+$",
+        re.ASCII
+    )
+    # The same rules split at the '@', so each half is matched on its own
+    LOCAL_REGEX = re.compile(r"[a-zA-Z0-9.!#$%&'*+/=?^_`{|}~-]++", re.ASCII)
+    DOMAIN_REGEX = re.compile(
+        r"[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?+"
+        r"(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?+)*+",
+        re.ASCII
     )
     
-    def __init__(self, timeout: int = 5):
+    def __init__(self, timeout: int = DEFAULT_DNS_TIMEOUT):
         self.timeout = timeout
-        # Configure DNS resolver
-        self.resolver = dns.resolver.Resolver()
-        self.resolver.timeout = timeout
-        self.resolver.lifetime = timeout
+        # Sync resolver for single lookups, async one for validate_batch.
+        # Only a custom timeout needs its own pair.
+        if timeout == DEFAULT_DNS_TIMEOUT:
+            self.resolver, self.async_resolver = _get_default_resolvers()
+        else:
+            self.resolver, self.async_resolver = _build_resolvers(timeout)
     
     def validate_syntax(self, email: str) -> bool:
         """Check if email has valid syntax"""
-        if not email or len(email) > 254:
+        # Cheap structural checks reject most malformed input before any regex runs
+        if not email or len(email) > 254 or email.count('@') != 1 or '..' in email:
+            return False
+        local, domain = email.rsplit('@', 1)
+        if not (1 <= len(local) <= 64 and 1 <= len(domain) <= 253):
             return False
-        return bool(self.EMAIL_REGEX.match(email))
+        return bool(self.LOCAL_REGEX.fullmatch(local) and self.DOMAIN_REGEX.fullmatch(domain))
     
     def extract_domain(self, email: str) -> Optional[str]:
         """Extract domain from email address"""
-        try:
-            return email.split('@')[1].lower()
-        except (IndexError, AttributeError):
+        if not email or '@' not in email:
             return None
+        return email.rsplit('@', 1)[1].lower()
     
     def is_disposable(self, domain: str) -> bool:
         """Check if email domain is a disposable email provider"""
-        return domain.lower() in DISPOSABLE_DOMAINS
+        return is_disposable_domain(domain.lower())
     
     def is_role_based(self, email: str) -> bool:
         """Check if email is role-based (not personal)"""
-        try:
-            local_part = email.split('@')[0].lower()
-            return local_part in ROLE_BASED_PREFIXES
-        except Exception:
-            return False
+        return is_role_based_local(email.partition('@')[0].lower())
     
-    @lru_cache(maxsize=1000)
     def check_mx_record(self, domain: str) -> Tuple[bool, str]:
         """
         Check if domain has valid MX records.
-        Uses caching to avoid repeated lookups.
+        Results are kept in a process-wide TTL cache shared by all validators.
         """
+        cached = _mx_cache_get(domain)
+        if cached is not None:
+            return cached
+        
+        # Concurrent cold lookups for the same domain share one DNS query
+        flight, leader = _mx_claim(domain)
+        if not leader:
+            flight.event.wait(self.timeout)
+            if flight.result is not None:
+                return flight.result
+            return self._lookup_mx(domain)
+        
+        result = None
+        try:
+            result = self._lookup_mx(domain)
+            return result
+        finally:
+            _mx_release(domain, flight, result)
+    
+    def _lookup_mx(self, domain: str) -> Tuple[bool, str]:
+        """Uncached MX lookup with A-record fallback"""
         try:
             # Try to get MX records
-            mx_records = self.resolver.resolve(domain, 'MX')
+            mx_records = self.resolver.resolve(_dns_name(domain), 'MX')
             if mx_records:
                 return True, f"MX: {str(mx_records[0].exchange)}"
         except dns.resolver.NXDOMAIN:
@@ -134,7 +319,7 @@ class EmailValidator:
         except dns.resolver.NoAnswer:
             # No MX record, try A record fallback
             try:
-                a_records = self.resolver.resolve(domain, 'A')
+                a_records = self.resolver.resolve(_dns_name(domain), 'A')
                 if a_records:
                     return True, "A record fallback (no MX)"
             except Exception:
@@ -147,6 +332,53 @@ class EmailValidator:
         
         return False, "Unknown error"
     
+    async def _resolve_mx(self, domain: str, semaphore: asyncio.Semaphore) -> Tuple[bool, str]:
+        """Async variant of check_mx_record (non-blocking DNS)."""
+        async with semaphore:
+            try:
+                mx_records = await self.async_resolver.resolve(_dns_name(domain), 'MX')
+                if mx_records:
+                    return True, f"MX: {str(mx_records[0].exchange)}"
+            except dns.resolver.NXDOMAIN:
+                return False, "Domain does not exist"
+            except dns.resolver.NoAnswer:
+                try:
+                    a_records = await self.async_resolver.resolve(_dns_name(domain), 'A')
+                    if a_records:
+                        return True, "A record fallback (no MX)"
+                except Exception:
+                    pass
+                return False, "No MX or A record"
+            except dns.resolver.Timeout:
+                return False, "DNS timeout"
+            except Exception as e:
+                return False, f"DNS error: {str(e)[:50]}"
+            
+            return False, "Unknown error"
+    
+    async def _resolve_mx_many(self, domains: list) -> dict:
+        """Resolve MX records for several domains concurrently -> {domain: (has_mx, reason)}"""
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_DNS)
+        results = await asyncio.gather(*[self._resolve_mx_shared(d, semaphore) for d in domains])
+        return dict(zip(domains, results))
+    
+    async def _resolve_mx_shared(self, domain: str, semaphore: asyncio.Semaphore) -> Tuple[bool, str]:
+        """_resolve_mx behind the same singleflight guard as check_mx_record"""
+        flight, leader = _mx_claim(domain)
+        if not leader:
+            # The leader may be another thread's loop, so wait off-loop
+            await asyncio.to_thread(flight.event.wait, self.timeout)
+            if flight.result is not None:
+                return flight.result
+            return await self._resolve_mx(domain, semaphore)
+        
+        result = None
+        try:
+            result = await self._resolve_mx(domain, semaphore)
+            return result
+        finally:
+            _mx_release(domain, flight, result)
+    
     def calculate_score(self, 
                        syntax_valid: bool,
                        has_mx: bool,
@@ -183,6 +415,10 @@ class EmailValidator:
         - is_deliverable: Email is likely deliverable
         - score: 0-100 deliverability score
         """
+        return self._validate(email)
+    
+    def _validate(self, email: str, mx_results: Optional[dict] = None) -> EmailValidationResult:
+        """validate() with optional pre-resolved {domain: (has_mx, reason)} results"""
         email = email.strip().lower() if email else ""
         
         # Step 1: Syntax validation
@@ -198,28 +434,26 @@ class EmailValidator:
                 reason="Invalid email syntax"
             )
         
-        # Step 2: Extract domain
-        domain = self.extract_domain(email)
-        if not domain:
-            return EmailValidationResult(
-                email=email,
-                is_valid=False,
-                is_deliverable=False,
-                is_disposable=False,
-                is_role_based=False,
-                has_mx_record=False,
-                score=0,
-                reason="Could not extract domain"
-            )
+        # Step 2: Split once; validate_syntax guarantees a single '@' and
+        # non-empty local and domain parts
+        local_part, _, domain = email.partition('@')
         
         # Step 3: Check disposable
-        is_disposable = self.is_disposable(domain)
+        is_disposable = is_disposable_domain(domain)
         
         # Step 4: Check role-based
-        is_role_based = self.is_role_based(email)
+        is_role_based = is_role_based_local(local_part)
         
-        # Step 5: Check MX records
-        has_mx, mx_reason = self.check_mx_record(domain)
+        # Step 5: Check MX records. Disposable domains are never deliverable
+        # and impossible TLDs can't resolve, so neither is worth a DNS query.
+        if is_disposable:
+            has_mx, mx_reason = False, ""
+        elif len(domain.rpartition('.')[2]) > MAX_TLD_LENGTH:
+            has_mx, mx_reason = False, "Invalid top-level domain"
+        elif mx_results is not None and domain in mx_results:
+            has_mx, mx_reason = mx_results[domain]
+        else:
+            has_mx, mx_reason = self.check_mx_record(domain)
         
         # Step 6: Calculate score
         score = self.calculate_score(
@@ -238,7 +472,7 @@ class EmailValidator:
             reasons.append("Disposable email")
         if is_role_based:
             reasons.append("Role-based address")
-        if not has_mx:
+        if not has_mx and mx_reason:
             reasons.append(mx_reason)
         
         if not reasons:
@@ -258,9 +492,63 @@ class EmailValidator:
             domain=domain
         )
     
+    def _batch_mx_results(self, emails: list) -> Tuple[dict, list]:
+        """
+        Split the batch's unique domains into cached MX results and the
+        cold domains still to resolve -> ({domain: (has_mx, reason)}, [domain])
+        """
+        domains = set()
+        for email in emails:
+            email = email.strip().lower() if email else ""
+            if self.validate_syntax(email):
+                domain = _domain_from_validated(email)
+                # Same skips as _validate: no lookup for disposable or impossible TLDs
+                if not is_disposable_domain(domain) and len(domain.rpartition('.')[2]) <= MAX_TLD_LENGTH:
+                    domains.add(domain)
+        
+        # Warm-cache domains skip DNS entirely
+        mx_results = {}
+        for domain in domains:
+            cached = _mx_cache_get(domain)
+            if cached is not None:
+                mx_results[domain] = cached
+        domains.difference_update(mx_results)
+        return mx_results, list(domains)
+    
+    def _resolve_mx_threaded(self, domains: list) -> dict:
+        """Resolve MX records for several domains on a bounded thread pool"""
+        with ThreadPoolExecutor(max_workers=min(MAX_DNS_THREADS, len(domains))) as pool:
+            return dict(zip(domains, pool.map(self.check_mx_record, domains)))
+    
     def validate_batch(self, emails: list) -> list:
-        """Validate multiple emails"""
-        return [self.validate(email) for email in emails]
+        """
+        Validate multiple emails.
+        MX lookups for the unique domains run concurrently up front, so a
+        batch waits roughly one DNS round-trip instead of one per email.
+        """
+        mx_results, domains = self._batch_mx_results(emails)
+        if len(domains) > 1:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                mx_results.update(asyncio.run(self._resolve_mx_many(domains)))
+            else:
+                # Called from inside an event loop, where asyncio.run() is not allowed
+                mx_results.update(self._resolve_mx_threaded(domains))
+        
+        return [self._validate(email, mx_results) for email in emails]
+    
+    def validate_batch_threaded(self, emails: list) -> list:
+        """
+        validate_batch using a thread pool over check_mx_record instead of
+        an event loop. Same results; for callers that already run their own
+        loop in this thread or prefer plain threads.
+        """
+        mx_results, domains = self._batch_mx_results(emails)
+        if len(domains) > 1:
+            mx_results.update(self._resolve_mx_threaded(domains))
+        
+        return [self._validate(email, mx_results) for email in emails]
 
 
 # Singleton instance
@@ -284,6 +572,11 @@ def validate_emails(emails: list) -> list:
     return get_validator().validate_batch(emails)
 
 
+def validate_emails_threaded(emails: list) -> list:
+    """Convenience function for batch validation on a thread pool"""
+    return get_validator().validate_batch_threaded(emails)
+
+
 if __name__ == "__main__":
     # Test validation
     test_emails = [
@@ -14,12 +14,18 @@ Research shows 80% of sales require 5+ follow-ups.
 This engine automates the tedious follow-up process.
 """
 import os
+import re
 import sys
 import logging
+from itertools import accumulate
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum
+from types import MappingProxyType
+
+from sqlalchemy import or_, text
+from sqlalchemy.exc import SQLAlchemyError
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -27,15 +33,24 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-class FollowUpStatus(Enum):
-    PENDING = "pending"
-    SENT = "sent"
-    SKIPPED = "skipped"  # User replied before this was sent
-    FAILED = "failed"
-    CANCELLED = "cancelled"
+# Lead statuses that end a follow-up sequence
+SEQUENCE_STOP_STATUSES = ('replied', 'converted', 'archived', 'bad_fit')
+
+
+class FollowUpStatus(IntEnum):
+    PENDING = 0
+    SENT = 1
+    SKIPPED = 2  # User replied before this was sent
+    FAILED = 3
+    CANCELLED = 4
+
 
+# String form stored in lead_follow_ups.status and returned by to_dict()
+_STATUS_NAMES = {status: status.name.lower() for status in FollowUpStatus}
+_PENDING = _STATUS_NAMES[FollowUpStatus.PENDING]
 
-@dataclass
+
+@dataclass(slots=True)
 class FollowUpEmail:
     """Represents a single follow-up email in a sequence"""
     sequence_position: int  # 1, 2, 3, etc.
@@ -51,19 +66,24 @@ class FollowUpEmail:
             'position': self.sequence_position,
             'delay_days': self.delay_days,
             'subject': self.subject_template,
-            'status': self.status.value,
+            'status': _STATUS_NAMES[self.status],
             'scheduled_for': self.scheduled_for.isoformat() if self.scheduled_for else None,
             'sent_at': self.sent_at.isoformat() if self.sent_at else None,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class FollowUpSequence:
     """A complete follow-up sequence configuration"""
     name: str
     description: str
     emails: List[FollowUpEmail] = field(default_factory=list)
     is_active: bool = True
+    # Days from the sequence start to each email, derived from delay_days
+    cumulative_days: Tuple[int, ...] = field(init=False, default=(), repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.cumulative_days = tuple(accumulate(e.delay_days for e in self.emails))
     
     def to_dict(self):
         return {
@@ -75,6 +95,17 @@ class FollowUpSequence:
         }
 
 
+# {variable} placeholders, for templates format_map can't parse
+_TEMPLATE_VAR_RE = re.compile(r'\{(\w+)\}')
+
+
+class _TemplateVars(dict):
+    """format_map mapping that leaves unknown {placeholders} untouched"""
+    
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+
 # Pre-built sequences for different use cases
 DEFAULT_SEQUENCES = {
     "saas_demo": FollowUpSequence(
@@ -257,14 +288,24 @@ No hard sell - just a conversation to see if I can add value.
 }
 
 
+# Read-only view shared by every engine
+_DEFAULT_SEQUENCES_VIEW = MappingProxyType(DEFAULT_SEQUENCES)
+
+
 class FollowUpEngine:
     """
     Manages follow-up sequences for leads.
     Handles scheduling, sending, and tracking of automated emails.
     """
     
-    def __init__(self):
-        self.sequences = DEFAULT_SEQUENCES.copy()
+    # Engines share the default sequences until one adds its own
+    sequences = _DEFAULT_SEQUENCES_VIEW
+    
+    def add_sequence(self, key: str, sequence: FollowUpSequence):
+        """Register a custom sequence on this engine (copy-on-write)"""
+        if self.sequences is _DEFAULT_SEQUENCES_VIEW:
+            self.sequences = dict(_DEFAULT_SEQUENCES_VIEW)
+        self.sequences[key] = sequence
     
     def get_sequence(self, name: str) -> Optional[FollowUpSequence]:
         """Get a sequence by name"""
@@ -282,32 +323,76 @@ class FollowUpEngine:
     ) -> List[Dict]:
         """
         Create a follow-up schedule for a lead.
-        Returns list of scheduled emails with dates.
+        Returns list of scheduled emails with dates (dry run; use
+        materialize_schedule to write it to the database).
         """
         sequence = self.get_sequence(sequence_name)
         if not sequence:
             raise ValueError(f"Unknown sequence: {sequence_name}")
         
         start = start_date or datetime.utcnow()
-        schedule = []
-        current_date = start
         
-        for email in sequence.emails:
-            scheduled_time = current_date + timedelta(days=email.delay_days)
-            
-            schedule.append({
+        return [
+            {
                 'lead_id': lead_id,
                 'sequence_name': sequence_name,
                 'position': email.sequence_position,
-                'scheduled_for': scheduled_time,
+                'scheduled_for': start + timedelta(days=days),
                 'subject_template': email.subject_template,
                 'body_template': email.body_template,
-                'status': FollowUpStatus.PENDING.value,
-            })
-            
-            current_date = scheduled_time
+                'status': _PENDING,
+            }
+            for email, days in zip(sequence.emails, sequence.cumulative_days)
+        ]
+    
+    def materialize_schedule(
+        self,
+        lead_id: int,
+        user_id: int,
+        sequence_name: str,
+        start_date: datetime = None,
+        lead_data: Optional[Dict] = None,
+        sender_data: Optional[Dict] = None
+    ) -> int:
+        """
+        Write a lead's whole follow-up schedule to lead_follow_ups in one
+        multi-row INSERT. Positions that already exist are left untouched,
+        so re-enrolling a lead is a no-op.
+        
+        Subjects and bodies are personalized when lead_data is given,
+        otherwise the raw templates are stored. Returns the number of
+        emails in the sequence.
+        """
+        sequence = self.get_sequence(sequence_name)
+        if not sequence:
+            raise ValueError(f"Unknown sequence: {sequence_name}")
+        
+        from models import db
+        
+        start = start_date or datetime.utcnow()
+        params = {'lead_id': lead_id, 'user_id': user_id, 'sequence_name': sequence_name, 'status': _PENDING}
+        values = []
+        for i, (email, days) in enumerate(zip(sequence.emails, sequence.cumulative_days)):
+            subject, body = email.subject_template, email.body_template
+            if lead_data is not None:
+                subject = self.personalize_email(subject, lead_data, sender_data or {})
+                body = self.personalize_email(body, lead_data, sender_data or {})
+            params.update({f'position_{i}': email.sequence_position,
+                           f'scheduled_for_{i}': start + timedelta(days=days),
+                           f'subject_{i}': subject, f'body_{i}': body})
+            values.append(f"(:lead_id, :user_id, :sequence_name, :position_{i}, "
+                          f":scheduled_for_{i}, :subject_{i}, :body_{i}, :status)")
         
-        return schedule
+        if values:
+            db.session.execute(text(f"""
+                INSERT INTO lead_follow_ups
+                    (lead_id, user_id, sequence_name, position, scheduled_for, subject, body, status)
+                VALUES {', '.join(values)}
+                ON CONFLICT (lead_id, sequence_name, position) DO NOTHING
+            """), params)
+            db.session.commit()
+        
+        return len(sequence.emails)
     
     def personalize_email(
         self,
@@ -343,51 +428,57 @@ class FollowUpEngine:
             'tip_3': 'Follow up consistently',
         }
         
-        result = template
-        for key, value in replacements.items():
-            result = result.replace('{' + key + '}', str(value))
-        
-        return result
+        # One pass over the template instead of one str.replace per variable
+        try:
+            return template.format_map(_TemplateVars(replacements))
+        except (ValueError, IndexError, AttributeError):
+            # Stray braces or non-name fields in a custom template: still a
+            # single scan, substituting only the {variables} we know
+            return _TEMPLATE_VAR_RE.sub(
+                lambda m: str(replacements.get(m.group(1), m.group(0))), template
+            )
     
-    def get_next_pending_emails(self, limit: int = 50) -> List[Dict]:
+    def get_next_pending_emails(
+        self,
+        limit: int = 50,
+        last_seen: Optional[Tuple[datetime, int]] = None
+    ) -> List[Dict]:
         """
         Get next emails that should be sent.
         Query the database for pending follow-ups where scheduled_for <= now.
+        
+        Rows come back ordered by (scheduled_for, id). A worker paging
+        through a backlog passes the last row's (scheduled_for, id) as
+        `last_seen` to continue after it with an index range seek instead
+        of re-reading rows it already has.
         """
         try:
             # We need to use raw SQL or SQLAlchemy here. 
             # Since this class might be used outside app context, we import inside.
             from models import db
-            from sqlalchemy import text
+            
+            params = {
+                'now': datetime.utcnow(),
+                'limit': limit
+            }
+            keyset = ""
+            if last_seen is not None:
+                keyset = "AND (scheduled_for, id) > (:last_ts, :last_id)"
+                params['last_ts'], params['last_id'] = last_seen
             
             # Using raw SQL for performance and clarity on the specific fields
-            sql = text("""
+            sql = text(f"""
                 SELECT id, lead_id, sequence_name, position, subject, body, scheduled_for
                 FROM lead_follow_ups
                 WHERE status = 'pending' 
                 AND scheduled_for <= :now
-                ORDER BY scheduled_for ASC
+                {keyset}
+                ORDER BY scheduled_for ASC, id ASC
                 LIMIT :limit
             """)
             
-            result = db.session.execute(sql, {
-                'now': datetime.utcnow(),
-                'limit': limit
-            }).fetchall()
-            
-            pending_emails = []
-            for row in result:
-                pending_emails.append({
-                    'id': row.id,
-                    'lead_id': row.lead_id,
-                    'sequence_name': row.sequence_name,
-                    'position': row.position,
-                    'subject': row.subject,
-                    'body': row.body,
-                    'scheduled_for': row.scheduled_for
-                })
-                
-            return pending_emails
+            result = db.session.execute(sql, params).mappings()
+            return [dict(row) for row in result]
             
         except ImportError:
             logger.error("Could not import database models. Ensure app context is active.")
@@ -407,28 +498,50 @@ class FollowUpEngine:
         - Lead has unsubscribed (not yet implemented fields but safe defaults)
         - Lead status is not 'new' or 'contacted'
         """
+        from models import Lead
+        
         try:
-            from models import Lead
             lead = Lead.query.get(lead_id)
-            
-            if not lead:
-                return False, "Lead not found"
-            
-            # 1. Check if lead replied
-            if lead.email_replied:
-                return False, "Lead replied"
-            
-            # 2. Check status
-            STOP_STATUSES = ['replied', 'converted', 'archived', 'bad_fit']
-            if lead.status in STOP_STATUSES:
-                return False, f"Lead status is {lead.status}"
-            
-            return True, "Continue"
-            
-        except Exception as e:
+        except SQLAlchemyError as e:
             logger.error(f"Error checking sequence continuation for lead {lead_id}: {e}")
             # Fail safe: iterate but log error
             return True, "Error checking status (fail-open)"
+        
+        if not lead:
+            return False, "Lead not found"
+        
+        # 1. Check if lead replied
+        if lead.email_replied:
+            return False, "Lead replied"
+        
+        # 2. Check status
+        if lead.status in SEQUENCE_STOP_STATUSES:
+            return False, f"Lead status is {lead.status}"
+        
+        return True, "Continue"
+    
+    def filter_continuable(self, lead_ids: List[int]) -> set:
+        """
+        Batch version of should_continue_sequence for a worker tick.
+        Returns the subset of lead_ids whose sequence should continue,
+        using one query instead of one per lead.
+        """
+        if not lead_ids:
+            return set()
+        from models import Lead
+        
+        try:
+            rows = Lead.query.with_entities(Lead.id).filter(
+                Lead.id.in_(set(lead_ids)),
+                or_(Lead.email_replied.is_(None), Lead.email_replied.is_(False)),
+                or_(Lead.status.is_(None), Lead.status.notin_(SEQUENCE_STOP_STATUSES))
+            )
+            return {row.id for row in rows}
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Error checking sequence continuation for {len(lead_ids)} leads: {e}")
+            # Fail safe, same as should_continue_sequence
+            return set(lead_ids)
 
 
 # Database model for follow-up tracking
@@ -452,8 +565,11 @@ CREATE TABLE IF NOT EXISTS lead_follow_ups (
     UNIQUE(lead_id, sequence_name, position)
 );
 
-CREATE INDEX IF NOT EXISTS idx_followups_scheduled 
-ON lead_follow_ups(scheduled_for) 
+-- (scheduled_for, id) so get_next_pending_emails can keyset-paginate
+-- pending rows straight off the index
+DROP INDEX IF EXISTS idx_followups_scheduled;
+CREATE INDEX IF NOT EXISTS idx_followups_pending 
+ON lead_follow_ups(scheduled_for, id) 
 WHERE status = 'pending';
 
 CREATE INDEX IF NOT EXISTS idx_followups_lead 
@@ -461,9 +577,15 @@ ON lead_follow_ups(lead_id);
 """
 
 
+# Singleton instance
+_engine = None
+
 def get_engine() -> FollowUpEngine:
-    """Get follow-up engine singleton"""
-    return FollowUpEngine()
+    """Get or create follow-up engine singleton"""
+    global _engine
+    if _engine is None:
+        _engine = FollowUpEngine()
+    return _engine
 
 
 if __name__ == "__main__":
@@ -4,6 +4,12 @@ Lead Finder AI - Industry Templates
 Keywords y configuración PRE-DEFINIDA por industria.
 El usuario solo selecciona su industria, no configura keywords.
 """
+import sys
+
+try:
+    import ahocorasick  # pyahocorasick
+except ImportError:
+    ahocorasick = None
 
 INDUSTRY_TEMPLATES = {
     # ═══════════════════════════════════════════════════════════
@@ -292,35 +298,123 @@ INDUSTRY_TEMPLATES = {
 }
 
 
-def get_all_industries():
-    """Retorna lista de todas las industrias disponibles"""
-    return [
-        {
-            "id": key,
-            "name": data["name"],
-            "icon": data["icon"],
-            "description": data["description"],
-            "example_lead": data.get("example_lead", "")
-        }
-        for key, data in INDUSTRY_TEMPLATES.items()
-    ]
+_DEFAULT_INDUSTRY = "marketing_agency"
+VALID_INDUSTRIES = frozenset(INDUSTRY_TEMPLATES)
+
+# Índices precalculados al importar: los getters solo hacen una búsqueda en dict
+_ALL_INDUSTRIES = tuple(
+    {
+        "id": key,
+        "name": data["name"],
+        "icon": data["icon"],
+        "description": data["description"],
+        "example_lead": data.get("example_lead", "")
+    }
+    for key, data in INDUSTRY_TEMPLATES.items()
+)
+# Strings internados: las comparaciones repetidas (p.ej. subreddit == "Entrepreneur") comparan identidad
+_KEYWORDS_BY_INDUSTRY = {
+    key: tuple(sys.intern(kw) for kw in data.get("keywords", ())) for key, data in INDUSTRY_TEMPLATES.items()
+}
+_SUBREDDITS_BY_INDUSTRY = {
+    key: tuple(sys.intern(sub) for sub in data.get("subreddits", ())) for key, data in INDUSTRY_TEMPLATES.items()
+}
+
+
+def _index_industries_by(field):
+    """Índice inverso {valor: (industry_id, ...)} para un campo lista de las plantillas"""
+    index = {}
+    for key, data in INDUSTRY_TEMPLATES.items():
+        for value in data.get(field, ()):
+            index.setdefault(value, []).append(key)
+    return {value: tuple(keys) for value, keys in index.items()}
+
+
+_INDUSTRIES_BY_PLATFORM = _index_industries_by("platforms")
+_INDUSTRIES_BY_LANGUAGE = _index_industries_by("languages")
+
+# Todos los subreddits sin repetir, para una sola consulta r/sub1+sub2+...
+ALL_SUBREDDITS_FLAT = tuple(sorted({sub for subs in _SUBREDDITS_BY_INDUSTRY.values() for sub in subs}))
+
+
+def _build_keyword_automaton():
+    """Autómata Aho-Corasick con las keywords de todas las industrias"""
+    automaton = ahocorasick.Automaton()
+    for key, keywords in _KEYWORDS_BY_INDUSTRY.items():
+        for kw in keywords:
+            lowered = kw.lower()
+            if lowered in automaton:
+                automaton.get(lowered).append((key, kw))
+            else:
+                automaton.add_word(lowered, [(key, kw)])
+    automaton.make_automaton()
+    return automaton
+
+
+# Sin pyahocorasick se usa una búsqueda de substring por keyword (mismo resultado)
+_KEYWORD_AUTOMATON = _build_keyword_automaton() if ahocorasick is not None else None
+_LOWER_KEYWORDS_BY_INDUSTRY = {
+    key: tuple((kw.lower(), kw) for kw in keywords) for key, keywords in _KEYWORDS_BY_INDUSTRY.items()
+}
+
+
+def match_industries(text: str) -> dict:
+    """
+    Detecta qué keywords de cada industria aparecen en un texto.
+    Retorna {industry_id: [keywords]} en una sola pasada sobre el texto.
+    """
+    text = text.lower()
+    matches = {}
+    if _KEYWORD_AUTOMATON is not None:
+        seen = set()
+        for _, hits in _KEYWORD_AUTOMATON.iter(text):
+            for key, kw in hits:
+                if (key, kw) not in seen:
+                    seen.add((key, kw))
+                    matches.setdefault(key, []).append(kw)
+        return matches
+    
+    for key, keywords in _LOWER_KEYWORDS_BY_INDUSTRY.items():
+        found = [kw for lowered, kw in keywords if lowered in text]
+        if found:
+            matches[key] = found
+    return matches
+
+
+def get_all_industries() -> tuple:
+    """Retorna todas las industrias disponibles (tupla compartida, no modificar)"""
+    return _ALL_INDUSTRIES
 
 
 def get_industry_config(industry_id: str) -> dict:
     """Obtiene la configuración completa de una industria"""
-    return INDUSTRY_TEMPLATES.get(industry_id, INDUSTRY_TEMPLATES["marketing_agency"])
+    if industry_id not in VALID_INDUSTRIES:
+        industry_id = _DEFAULT_INDUSTRY
+    return INDUSTRY_TEMPLATES[industry_id]
 
 
-def get_keywords_for_industry(industry_id: str) -> list:
+def get_keywords_for_industry(industry_id: str) -> tuple:
     """Obtiene solo las keywords de una industria"""
-    config = get_industry_config(industry_id)
-    return config.get("keywords", [])
+    if industry_id not in VALID_INDUSTRIES:
+        industry_id = _DEFAULT_INDUSTRY
+    return _KEYWORDS_BY_INDUSTRY[industry_id]
 
 
-def get_subreddits_for_industry(industry_id: str) -> list:
+def get_subreddits_for_industry(industry_id: str) -> tuple:
     """Obtiene los subreddits de una industria"""
-    config = get_industry_config(industry_id)
-    return config.get("subreddits", [])
+    if industry_id not in VALID_INDUSTRIES:
+        industry_id = _DEFAULT_INDUSTRY
+    return _SUBREDDITS_BY_INDUSTRY[industry_id]
+
+
+def get_industries_for_platform(platform: str) -> tuple:
+    """Obtiene las industrias que buscan leads en una plataforma"""
+    return _INDUSTRIES_BY_PLATFORM.get(platform, ())
+
+
+def get_industries_for_language(language: str) -> tuple:
+    """Obtiene las industrias que buscan leads en un idioma"""
+    return _INDUSTRIES_BY_LANGUAGE.get(language, ())
 
 
 if __name__ == "__main__":
@@ -3,60 +3,176 @@ Lead Finder AI - Mailer Module
 Handles sending emails via SMTP or logging them if not configured
 """
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
 import os
-from datetime import datetime
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+SIMULATION_LOG_FILE = 'mail_simulation.log'
+SIMULATION_LOG_MAX_BYTES = 10 * 1024 * 1024
+SIMULATION_LOG_BACKUPS = 3
+
+_sim_log = None
+_sim_log_lock = threading.Lock()
+
+
+def _simulation_logger():
+    """
+    Logger for simulated sends. Records go through a queue to a background
+    thread that writes the rotating log file, so send() never waits on disk.
+    Created on first use; the listener is flushed and stopped at exit.
+    """
+    global _sim_log
+    if _sim_log is not None:
+        return _sim_log
+    with _sim_log_lock:
+        if _sim_log is None:
+            handler = logging.handlers.RotatingFileHandler(
+                SIMULATION_LOG_FILE, maxBytes=SIMULATION_LOG_MAX_BYTES,
+                backupCount=SIMULATION_LOG_BACKUPS, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
+            sim_queue = queue.SimpleQueue()
+            listener = logging.handlers.QueueListener(sim_queue, handler)
+            listener.start()
+            atexit.register(listener.stop)
+
+            logger = logging.getLogger('mailsim')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False  # ya se imprime por consola en send()
+            logger.addHandler(logging.handlers.QueueHandler(sim_queue))
+            _sim_log = logger
+    return _sim_log
+
+
+def _smtp_settings(config=None):
+    """
+    Resolves SMTP settings from a config dict or the environment.
+    Returns (server, port, username, password, from_name, from_addr)
+    """
+    if config:
+        return (
+            config.get('server'),
+            config.get('port', 587),
+            config.get('username'),
+            config.get('password'),
+            config.get('sender_name') or 'Lead Finder AI',
+            config.get('username'),
+        )
+    return (
+        os.getenv('SMTP_SERVER'),
+        os.getenv('SMTP_PORT', 587),
+        os.getenv('SMTP_USERNAME'),
+        os.getenv('SMTP_PASSWORD'),
+        os.getenv('EMAIL_FROM_NAME', 'Lead Finder AI'),
+        os.getenv('EMAIL_FROM_ADDRESS'),
+    )
+
+
+class SmtpSession:
+    """
+    One SMTP connection (STARTTLS + login) reused for several emails.
+    Connects lazily on the first send and reconnects once if the server
+    dropped the connection between sends.
+
+        with SmtpSession(config) as session:
+            for lead in leads:
+                session.send(lead.email, subject, body)
+    """
+
+    def __init__(self, config=None):
+        (self.smtp_server, self.smtp_port, self.smtp_user, self.smtp_password,
+         self.from_name, self.from_addr) = _smtp_settings(config)
+        self.server = None
+
+    @property
+    def simulated(self):
+        # Si falta configuración, simulamos el envío para no romper la app
+        return not all([self.smtp_server, self.smtp_user, self.smtp_password])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, int(self.smtp_port))
+        try:
+            server.starttls()
+            server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+
+    def connect(self):
+        """Connects now rather than on the first send (no-op if simulated or connected)"""
+        if self.simulated or self.server is not None:
+            return
+        self._connect()
+
+    def close(self):
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+        self.server = None
+
+    def send(self, to_email, subject, body):
+        """
+        Sends one email over the session's connection.
+        Returns: (bool, message)
+        """
+        if self.simulated:
+            log_msg = f"[SIMULATION] Email to {to_email} | Subject: {subject} | Body: {body[:50]}..."
+            print(log_msg)
+            # Guardar en un log local para que el usuario pueda verlo
+            _simulation_logger().info(log_msg)
+            return True, "Email simulated (SMTP not configured)"
+
+        try:
+            msg = EmailMessage()
+            msg['From'] = f"{self.from_name} <{self.from_addr}>"
+            msg['To'] = to_email
+            # EmailMessage rejects line breaks in headers; AI subjects can contain them
+            msg['Subject'] = ' '.join(subject.split())
+            msg.set_content(body)
+
+            if self.server is None:
+                self._connect()
+            try:
+                self.server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self.server = None
+                self._connect()
+                self.server.send_message(msg)
+
+            print(f"✓ Email sent to {to_email}")
+            return True, "Email sent successfully"
+        except Exception as e:
+            # Start from a fresh connection on the next send
+            self.close()
+            error_msg = f"Error sending email: {str(e)}"
+            print(error_msg)
+            return False, error_msg
+
 
 def send_smtp_email(to_email, subject, body, config=None):
     """
     Sends an email using SMTP if configured, otherwise logs it.
     config: Optional dict with 'server', 'port', 'username', 'password', 'sender_name'
     Returns: (bool, message)
+
+    Opens a connection for this one email; use SmtpSession to send several.
     """
-    if config:
-        smtp_server = config.get('server')
-        smtp_port = config.get('port', 587)
-        smtp_user = config.get('username')
-        smtp_password = config.get('password')
-        from_name = config.get('sender_name') or 'Lead Finder AI'
-        from_addr = smtp_user
-    else:
-        smtp_server = os.getenv('SMTP_SERVER')
-        smtp_port = os.getenv('SMTP_PORT', 587)
-        smtp_user = os.getenv('SMTP_USERNAME')
-        smtp_password = os.getenv('SMTP_PASSWORD')
-        from_name = os.getenv('EMAIL_FROM_NAME', 'Lead Finder AI')
-        from_addr = os.getenv('EMAIL_FROM_ADDRESS')
-
-    # Si falta configuración, simulamos el envío para no romper la app
-    if not all([smtp_server, smtp_user, smtp_password]):
-        log_msg = f"[SIMULATION] Email to {to_email} | Subject: {subject} | Body: {body[:50]}..."
-        print(log_msg)
-        # Guardar en un log local para que el usuario pueda verlo
-        with open('mail_simulation.log', 'a', encoding='utf-8') as f:
-            f.write(f"{datetime.now()} - {log_msg}\n")
-        return True, "Email simulated (SMTP not configured)"
-
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = f"{from_name} <{from_addr}>"
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP(smtp_server, int(smtp_port))
-        server.starttls()
-        server.login(smtp_user, smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
-        print(f"✓ Email sent to {to_email}")
-        return True, "Email sent successfully"
-    except Exception as e:
-        error_msg = f"Error sending email: {str(e)}"
-        print(error_msg)
-        return False, error_msg
+    with SmtpSession(config) as session:
+        return session.send(to_email, subject, body)
 
 if __name__ == "__main__":
     # Test simple
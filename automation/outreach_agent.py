@@ -6,7 +6,14 @@ Handles state management (status: contacted) and logs activity.
 """
 import os
 import sys
+import json
 import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from datetime import datetime
 
 # Add parent directory to path for imports
@@ -15,8 +22,12 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from dotenv import load_dotenv
 load_dotenv('.env.local')
 
-from models import db, Lead, User, UserSMTPConfig, AutomationLog
-from automation.mailer import send_smtp_email
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import joinedload
+
+from models import db, Lead, User, AutomationLog
+from automation.email_validator import EmailValidator
+from automation.mailer import SmtpSession
 from automation.qualifier import LeadQualifier
 
 logging.basicConfig(
@@ -25,29 +36,85 @@ logging.basicConfig(
 )
 logger = logging.getLogger("OutreachAgent")
 
-class OutreachAgent:
-    def __init__(self, app_context):
-        self.app_context = app_context
-        self.openai_key = os.getenv('OPENAI_API_KEY')
-        self.qualifier = LeadQualifier(api_key=self.openai_key) if self.openai_key else None
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json is a drop-in fallback
+    json_loads = json.loads
 
-    def generate_personalized_content(self, lead, user):
-        """
-        Uses AI to generate a highly personalized outreach email.
-        """
-        if not self.qualifier:
-            return None, None
+# Markdown code fence around model output, e.g. ```json ... ``` (the closing fence may be cut off)
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)\s*(?:```|$)", re.DOTALL)
+
+
+def _strip_fences(text):
+    """Return the body of a ```json fenced block, or the text unchanged."""
+    m = _FENCE_RE.search(text)
+    return m.group(1) if m else text
 
-        prompt = f"""Write a personalized B2B outreach email for this lead:
-Lead Name/Username: {lead.username}
-Platform: {lead.platform}
-Source (Subreddit/Tag): {lead.source}
-Post Title: {lead.title}
-Post Content: {lead.content[:1000]}
-Problem Summary: {lead.problem_summary}
+
+# Upper bound on OpenAI calls in flight while generating a batch's emails
+MAX_CONCURRENT_GENERATIONS = int(os.getenv('OUTREACH_CONCURRENCY', '10'))
+
+# Reply budgets for the generated emails (outreach is capped at 150 words)
+OUTREACH_MAX_TOKENS = 300
+CLOSING_MAX_TOKENS = 300
+
+# Upper bound on SMTP connections sending at the same time (one per user)
+MAX_CONCURRENT_SENDS = 8
+
+# Cached for users whose SMTP config exists but cannot be loaded (e.g. the
+# password no longer decrypts); their leads are skipped rather than sent
+# through the environment's default SMTP account
+_UNUSABLE_SMTP_CONFIG = object()
+
+# Initial outreach fetches this many candidates per email it aims to send
+OUTREACH_OVERFETCH = 3
+
+# Generated (subject, body) pairs, keyed by lead, user and prompt hash, so a
+# lead retried after a failed send does not pay for a second OpenAI call.
+# The scheduler builds a new agent per run, so the cache lives at module level.
+CONTENT_CACHE_TTL = 24 * 3600
+CONTENT_CACHE_MAX_SIZE = 1024
+_content_cache = OrderedDict()  # key -> (subject, body, expires_at)
+_content_cache_lock = threading.Lock()
+
+
+def _content_cache_get(key):
+    """Return a cached (subject, body) for key, or None if missing/expired"""
+    with _content_cache_lock:
+        entry = _content_cache.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[2]:
+            del _content_cache[key]
+            return None
+        _content_cache.move_to_end(key)
+        return entry[0], entry[1]
+
+
+def _content_cache_put(key, subject, body):
+    with _content_cache_lock:
+        _content_cache[key] = (subject, body, time.monotonic() + CONTENT_CACHE_TTL)
+        _content_cache.move_to_end(key)
+        while len(_content_cache) > CONTENT_CACHE_MAX_SIZE:
+            _content_cache.popitem(last=False)
+
+
+# Prompt skeletons and system messages are built once; each call only fills
+# in the lead's fields.
+_OUTREACH_SYSTEM = {"role": "system", "content": "You are an elite B2B Sales Representative specializing in high-conversion, low-pressure outreach. You response ONLY with JSON."}
+_CLOSING_SYSTEM = {"role": "system", "content": "You are a Senior Account Executive. Your goal is to close the deal. You response ONLY with JSON."}
+
+_OUTREACH_TEMPLATE = """Write a personalized B2B outreach email for this lead:
+Lead Name/Username: {username}
+Platform: {platform}
+Source (Subreddit/Tag): {source}
+Post Title: {title}
+Post Content: {content}
+Problem Summary: {problem_summary}
 
 Context:
-My Name: {user.name or "Founder of Ghost License Reaper"}
+My Name: {sender_name}
 My Product: Ghost License Reaper (Detects unused SaaS licenses and saves 15-30% on bills).
 
 Rules:
@@ -63,22 +130,69 @@ Return JSON:
     "body": "The email body text"
 }}"""
 
+_CLOSING_TEMPLATE = """The following lead has responded to our outreach. Analyze the response and write a follow-up to CLOSE THE SALE.
+        
+        Lead Response: {reply}
+        Context: They are interested in Ghost License Reaper.
+        Goal: Get them to pay $299 for the setup and first month via this link: {stripe_url}
+        
+        Rules:
+        1. If they have questions, answer them based on: 'Ghost License Reaper scans Gmail, finds unused licenses, saves 20%+, works in 5 mins'.
+        2. Be extremely professional and confident.
+        3. Include the payment link clearly.
+        4. Keep it very short.
+        
+        Return JSON:
+        {{
+            "intent": "positive/neutral/negative",
+            "subject": "Re: {email_subject}",
+            "body": "The closing email body"
+        }}"""
+
+
+class OutreachAgent:
+    def __init__(self, app_context):
+        self.app_context = app_context
+        self.openai_key = os.getenv('OPENAI_API_KEY')
+        self.qualifier = LeadQualifier(api_key=self.openai_key) if self.openai_key else None
+        # user_id -> SMTP config dict (or None), rebuilt every cycle
+        self._smtp_configs = {}
+
+    def generate_personalized_content(self, lead, user):
+        """
+        Uses AI to generate a highly personalized outreach email.
+        """
+        if not self.qualifier:
+            return None, None
+
+        prompt = _OUTREACH_TEMPLATE.format(
+            username=lead.username,
+            platform=lead.platform,
+            source=lead.source,
+            title=lead.title,
+            content=lead.content[:1000],
+            problem_summary=lead.problem_summary,
+            sender_name=user.name or "Founder of Ghost License Reaper"
+        )
+        # The prompt covers every input, so an edited lead misses the cache
+        cache_key = (lead.id, user.id, hash(prompt))
+        cached = _content_cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             # We reuse the qualifier's _call_openai method but with a custom prompt
             response_text = self.qualifier._call_openai([
-                {"role": "system", "content": "You are an elite B2B Sales Representative specializing in high-conversion, low-pressure outreach. You response ONLY with JSON."},
+                _OUTREACH_SYSTEM,
                 {"role": "user", "content": prompt}
-            ])
+            ], max_tokens=OUTREACH_MAX_TOKENS)
             
-            import json
             # Clean up response text if markdown or extra junk
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            content = json.loads(response_text)
-            return content.get('subject'), content.get('body')
+            content = json_loads(_strip_fences(response_text))
+            subject, body = content.get('subject'), content.get('body')
+            if subject and body:
+                _content_cache_put(cache_key, subject, body)
+            return subject, body
         except Exception as e:
             logger.error(f"Error generating content for lead {lead.id}: {e}")
             return None, None
@@ -92,36 +206,19 @@ Return JSON:
 
         stripe_url = os.getenv('PRODUCT_PAYMENT_URL', 'https://buy.stripe.com/test_eVaeXkd8j7SgeYwdQQ')
         
-        prompt = f"""The following lead has responded to our outreach. Analyze the response and write a follow-up to CLOSE THE SALE.
-        
-        Lead Response: {lead.last_reply_body}
-        Context: They are interested in Ghost License Reaper.
-        Goal: Get them to pay $299 for the setup and first month via this link: {stripe_url}
-        
-        Rules:
-        1. If they have questions, answer them based on: 'Ghost License Reaper scans Gmail, finds unused licenses, saves 20%+, works in 5 mins'.
-        2. Be extremely professional and confident.
-        3. Include the payment link clearly.
-        4. Keep it very short.
-        
-        Return JSON:
-        {{
-            "intent": "positive/neutral/negative",
-            "subject": "Re: {lead.email_subject}",
-            "body": "The closing email body"
-        }}"""
+        prompt = _CLOSING_TEMPLATE.format(
+            reply=lead.last_reply_body,
+            stripe_url=stripe_url,
+            email_subject=lead.email_subject
+        )
 
         try:
             response_text = self.qualifier._call_openai([
-                {"role": "system", "content": "You are a Senior Account Executive. Your goal is to close the deal. You response ONLY with JSON."},
+                _CLOSING_SYSTEM,
                 {"role": "user", "content": prompt}
-            ])
+            ], max_tokens=CLOSING_MAX_TOKENS)
             
-            import json
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            
-            content = json.loads(response_text)
+            content = json_loads(_strip_fences(response_text))
             if content.get('intent') == 'positive':
                 return content.get('subject'), content.get('body')
             return None, None
@@ -129,49 +226,205 @@ Return JSON:
             logger.error(f"Error generating closing for lead {lead.id}: {e}")
             return None, None
 
+    def _generate_concurrently(self, generate, leads):
+        """
+        Runs generate(lead, lead.user) for every lead on a thread pool and
+        returns the (subject, body) pairs in the same order.
+        """
+        if not leads:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(leads), MAX_CONCURRENT_GENERATIONS)) as pool:
+            return list(pool.map(lambda lead: generate(lead, lead.user), leads))
+
+    def _ensure_sessions(self, leads, sessions, stack):
+        """
+        Opens (without connecting) a session for each lead's user that has
+        none in sessions yet. Returns the newly opened sessions.
+        """
+        opened = []
+        for lead in leads:
+            if lead.user.id not in sessions:
+                session = sessions[lead.user.id] = stack.enter_context(self._open_smtp_session(lead.user))
+                opened.append(session)
+        return opened
+
+    def _generate_while_connecting(self, generate, leads, sessions, stack):
+        """
+        _generate_concurrently, with the SMTP handshake and login of users
+        who have no session yet running during the OpenAI calls instead of
+        after them. A failed early connect is retried by the first send.
+        """
+        new_sessions = self._ensure_sessions(leads, sessions, stack)
+        if not new_sessions:
+            return self._generate_concurrently(generate, leads)
+        with ThreadPoolExecutor(max_workers=min(len(new_sessions), MAX_CONCURRENT_SENDS)) as pool:
+            connecting = [pool.submit(session.connect) for session in new_sessions]
+            contents = self._generate_concurrently(generate, leads)
+            for future in connecting:
+                if future.exception() is not None:
+                    logger.warning(f"Early SMTP connect failed, retrying on send: {future.exception()}")
+        return contents
+
+    def _send_concurrently(self, messages, sessions, stack):
+        """
+        Sends (lead, subject, body) messages and returns each send's success
+        flag in the same order. Each user's messages go out in order over
+        that user's session (opened once and kept in sessions until stack
+        closes); different users' sessions send in parallel.
+        """
+        by_user = {}
+        for i, (lead, _, _) in enumerate(messages):
+            by_user.setdefault(lead.user.id, []).append(i)
+        self._ensure_sessions([lead for lead, _, _ in messages], sessions, stack)
+
+        results = [False] * len(messages)
+
+        def send_user_messages(user_id):
+            session = sessions[user_id]
+            for i in by_user[user_id]:
+                lead, subject, body = messages[i]
+                results[i], _ = session.send(lead.email, subject, body)
+
+        if len(by_user) == 1:
+            send_user_messages(next(iter(by_user)))
+        elif by_user:
+            with ThreadPoolExecutor(max_workers=min(len(by_user), MAX_CONCURRENT_SENDS)) as pool:
+                list(pool.map(send_user_messages, by_user))
+        return results
+
+    def _build_smtp_config(self, user):
+        """
+        SmtpSession config dict for a user's own SMTP config, None to use
+        the environment defaults, or _UNUSABLE_SMTP_CONFIG if their config
+        cannot be loaded. Memoized per user for the current cycle so the
+        password is decrypted once, not once per phase.
+        """
+        if user.id in self._smtp_configs:
+            return self._smtp_configs[user.id]
+        smtp_config = user.smtp_config
+        config_dict = None
+        if smtp_config:
+            try:
+                config_dict = {
+                    'server': smtp_config.smtp_server,
+                    'port': smtp_config.smtp_port,
+                    'username': smtp_config.smtp_username,
+                    'password': smtp_config.get_password(),
+                    'sender_name': smtp_config.sender_name
+                }
+            except Exception:
+                logger.exception(f"Could not load SMTP config for user {user.id}; skipping their leads")
+                config_dict = _UNUSABLE_SMTP_CONFIG
+        self._smtp_configs[user.id] = config_dict
+        return config_dict
+
+    def _can_send_as(self, user):
+        """False if the user has an SMTP config that cannot be loaded"""
+        return self._build_smtp_config(user) is not _UNUSABLE_SMTP_CONFIG
+
+    def _open_smtp_session(self, user):
+        """
+        SMTP session for a user's own SMTP config, or the environment
+        defaults if they have none.
+        """
+        return SmtpSession(self._build_smtp_config(user))
+
     def process_outreach_cycle(self, limit=5):
         """
         Runs both the initial outreach and the auto-closing phase.
         """
+        # Pick up SMTP config changes made since the last cycle
+        self._smtp_configs = {}
         sent_outreach = self._run_initial_outreach(limit)
         sent_closing = self._run_auto_closing(limit)
         return sent_outreach + sent_closing
 
+    def _filter_sendable(self, candidates):
+        """
+        Drops candidates not worth an OpenAI call: addresses with invalid
+        syntax, and addresses the same user already emailed (from another
+        lead row, or earlier in this batch). Dropped leads are archived so
+        they stop taking candidate slots in later cycles. One query.
+        """
+        validator = EmailValidator()
+        valid = []
+        for lead in candidates:
+            if validator.validate_syntax(lead.email.strip()):
+                valid.append(lead)
+            else:
+                lead.status = 'archived'
+                logger.info(f"Skipping lead {lead.id}: invalid email address {lead.email!r}")
+        if not valid:
+            return []
+
+        # (user_id, address) pairs already emailed, for the users and addresses in this batch
+        contacted = set(db.session.query(Lead.user_id, func.lower(func.trim(Lead.email))).filter(
+            Lead.user_id.in_({lead.user_id for lead in valid}),
+            func.lower(func.trim(Lead.email)).in_({lead.email.strip().lower() for lead in valid}),
+            Lead.email_sent_at.isnot(None)
+        ).distinct())
+
+        sendable = []
+        for lead in valid:
+            key = (lead.user_id, lead.email.strip().lower())
+            if key in contacted:
+                lead.status = 'archived'
+                logger.info(f"Skipping lead {lead.id}: {lead.email} was already contacted")
+                continue
+            contacted.add(key)
+            sendable.append(lead)
+        return sendable
+
     def _run_initial_outreach(self, limit):
         with self.app_context:
-            leads = Lead.query.filter(
+            # Fetch a few spare candidates so leads whose generation or send
+            # fails can be replaced in the same cycle. Users and their SMTP
+            # configs come back in the same query.
+            candidates = Lead.query.options(
+                joinedload(Lead.user).joinedload(User.smtp_config)
+            ).filter(
                 Lead.status == 'new',
                 Lead.score >= 9,
                 Lead.email.isnot(None)
-            ).limit(limit).all()
+            ).limit(limit * OUTREACH_OVERFETCH).all()
+            candidates = self._filter_sendable(
+                [lead for lead in candidates if lead.user and self._can_send_as(lead.user)]
+            )
 
+            # One timestamp for the whole batch
+            now = datetime.utcnow()
+            subjects = {}  # lead id -> subject of the email sent
             emails_sent = 0
-            for lead in leads:
-                user = User.query.get(lead.user_id)
-                if not user: continue
-                smtp_config = UserSMTPConfig.query.filter_by(user_id=user.id).first()
-                config_dict = None
-                if smtp_config:
-                    try:
-                        config_dict = {
-                            'server': smtp_config.smtp_server,
-                            'port': smtp_config.smtp_port,
-                            'username': smtp_config.smtp_username,
-                            'password': smtp_config.get_password(),
-                            'sender_name': smtp_config.sender_name
-                        }
-                    except: pass
-
-                subject, body = self.generate_personalized_content(lead, user)
-                if not subject or not body: continue
-
-                success, _ = send_smtp_email(lead.email, subject, body, config=config_dict)
-                if success:
-                    lead.email_subject = subject
-                    lead.status = 'contacted'
-                    lead.email_sent_at = datetime.utcnow()
-                    emails_sent += 1
+            next_candidate = 0
+            # One SMTP login per user for the whole batch
+            with ExitStack() as stack:
+                sessions = {}
+                # Generate only as many emails as are still missing, so spare
+                # candidates cost an OpenAI call only when they are needed
+                while emails_sent < limit and next_candidate < len(candidates):
+                    wave = candidates[next_candidate:next_candidate + limit - emails_sent]
+                    next_candidate += len(wave)
+                    contents = self._generate_while_connecting(
+                        self.generate_personalized_content, wave, sessions, stack
+                    )
+                    messages = [(lead, subject, body) for lead, (subject, body) in zip(wave, contents)
+                                if subject and body]
+
+                    results = self._send_concurrently(messages, sessions, stack)
+                    for (lead, subject, _), success in zip(messages, results):
+                        if success:
+                            subjects[lead.id] = subject
+                            emails_sent += 1
             
+            # One UPDATE for every lead contacted in this batch
+            if subjects:
+                db.session.execute(
+                    update(Lead).where(Lead.id.in_(subjects)).values(
+                        status='contacted',
+                        email_sent_at=now,
+                        email_subject=case(subjects, value=Lead.id)
+                    ).execution_options(synchronize_session=False)
+                )
             db.session.commit()
             return emails_sent
 
@@ -181,40 +434,37 @@ Return JSON:
         """
         with self.app_context:
             # Note: 'responded' status is set by the Supabase Edge Function detect-outreach-replies
-            leads = Lead.query.filter(
+            leads = Lead.query.options(
+                joinedload(Lead.user).joinedload(User.smtp_config)
+            ).filter(
                 Lead.status == 'responded',
                 Lead.email.isnot(None)
             ).limit(limit).all()
 
-            emails_sent = 0
-            for lead in leads:
-                user = User.query.get(lead.user_id)
-                if not user: continue
-                smtp_config = UserSMTPConfig.query.filter_by(user_id=user.id).first()
-                config_dict = None
-                if smtp_config:
-                    try:
-                        config_dict = {
-                            'server': smtp_config.smtp_server, 'port': smtp_config.smtp_port,
-                            'username': smtp_config.smtp_username, 'password': smtp_config.get_password(),
-                            'sender_name': smtp_config.sender_name
-                        }
-                    except: pass
-
-                subject, body = self.generate_closing_content(lead, user)
-                if not subject or not body:
-                    # If not positive or error, we might want to manually review
-                    continue
-
-                success, _ = send_smtp_email(lead.email, subject, body, config=config_dict)
-                if success:
-                    lead.status = 'closing' # Waiting for payment
-                    lead.email_replied = True # Ensure this is marked
-                    emails_sent += 1
-                    logger.info(f"💰 Closing link sent to interested lead: {lead.email}")
+            leads = [lead for lead in leads if lead.user and self._can_send_as(lead.user)]
+            contents = self._generate_concurrently(self.generate_closing_content, leads)
 
+            # If not positive or error, we might want to manually review
+            messages = [(lead, subject, body) for lead, (subject, body) in zip(leads, contents)
+                        if subject and body]
+
+            closed_ids = []
+            with ExitStack() as stack:
+                results = self._send_concurrently(messages, {}, stack)
+                for (lead, _, _), success in zip(messages, results):
+                    if success:
+                        closed_ids.append(lead.id)
+                        logger.info(f"💰 Closing link sent to interested lead: {lead.email}")
+
+            if closed_ids:
+                db.session.execute(
+                    update(Lead).where(Lead.id.in_(closed_ids)).values(
+                        status='closing',  # Waiting for payment
+                        email_replied=True  # Ensure this is marked
+                    ).execution_options(synchronize_session=False)
+                )
             db.session.commit()
-            return emails_sent
+            return len(closed_ids)
 
 if __name__ == "__main__":
     from app import app
@@ -0,0 +1,45 @@
+"""
+Lead Finder AI - Prompt Cache
+Exact-match cache for chat completions, keyed on a SHA-256 of the full
+request (model, messages, sampling settings). Persisted to SQLite so reruns
+of the pipeline over the same posts do not pay for the same tokens twice.
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_PATH = os.getenv(
+    'PROMPT_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'prompt_cache.sqlite')
+)
+
+
+def prompt_key(model: str, messages: List[Dict], **params) -> str:
+    """SHA-256 hex digest identifying a chat completion request"""
+    payload = json.dumps({'model': model, 'messages': messages, **params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class PromptCache:
+    """Maps prompt_key() digests to completion text"""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, response TEXT)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT response FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, response: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO llm_cache (key, response) VALUES (?, ?)", (key, response))
+            self._db.commit()
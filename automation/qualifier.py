@@ -3,12 +3,18 @@ Lead Finder AI - AI Lead Qualifier
 Uses OpenAI to score and qualify leads based on urgency, budget, and fit
 """
 import os
+import re
 import json
+import time
+import hashlib
 import logging
-from typing import List, Dict, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 
-from openai import OpenAI, APIError, RateLimitError, APIConnectionError
+import httpx
+from openai import OpenAI, DefaultHttpxClient, APIError, RateLimitError, APIConnectionError
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -17,9 +23,80 @@ from tenacity import (
     before_sleep_log
 )
 
+from automation.prompt_cache import PromptCache, prompt_key
+from automation.semantic_cache import SemanticCache, is_available as semantic_cache_available
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keep-alive pool for the qualifier's client, sized for the outreach agent's
+# concurrent generation; retries are handled by tenacity on _call_openai.
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+HTTP_TIMEOUT = 30.0
+
+# Calls are held back once a response reports fewer requests/tokens left
+# than this in the current rate-limit window, until the window resets.
+RATELIMIT_LOW_REQUESTS = int(os.getenv('OPENAI_RATELIMIT_LOW_REQUESTS', '2'))
+RATELIMIT_LOW_TOKENS = int(os.getenv('OPENAI_RATELIMIT_LOW_TOKENS', '4000'))
+_RESET_PART_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_RESET_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+# Sampling temperature for every call; completions at or below
+# PROMPT_CACHE_MAX_TEMPERATURE are close enough to deterministic to cache
+TEMPERATURE = 0.3
+PROMPT_CACHE_MAX_TEMPERATURE = 0.3
+
+# Requests in flight at the same time in qualify_batch
+QUALIFY_CONCURRENCY = int(os.getenv('QUALIFY_CONCURRENCY', '10'))
+# Leads scored per request by qualify_batch, and the reply budget per lead
+QUALIFY_BATCH_SIZE = int(os.getenv('QUALIFY_BATCH_SIZE', '8'))
+BATCH_MAX_TOKENS_PER_LEAD = 250
+
+
+def _prompt_cache_routing_key(messages: List[Dict]) -> str:
+    """Short stable id of the leading system prompt, for OpenAI's prompt_cache_key"""
+    first = messages[0] if messages else {}
+    return hashlib.sha256(str(first.get('content', '')).encode('utf-8')).hexdigest()[:16]
+
+
+def _parse_reset(value: Optional[str]) -> float:
+    """Seconds in an x-ratelimit-reset-* header value such as '6m0s' or '250ms'"""
+    return sum(float(n) * _RESET_UNITS[unit] for n, unit in _RESET_PART_RE.findall(value or ''))
+
+
+class RateLimitGate:
+    """
+    Proactive throttle driven by OpenAI's x-ratelimit-* response headers.
+    When a response shows the request or token budget nearly spent, later
+    calls wait for the window to reset instead of running into 429s.
+    Shared by every thread using the same LeadQualifier.
+    """
+
+    def __init__(self, low_requests: int = RATELIMIT_LOW_REQUESTS, low_tokens: int = RATELIMIT_LOW_TOKENS):
+        self.low_requests = low_requests
+        self.low_tokens = low_tokens
+        self._lock = threading.Lock()
+        self._open_at = 0.0
+
+    def wait(self) -> None:
+        delay = self._open_at - time.monotonic()
+        if delay > 0:
+            logger.info(f"OpenAI rate-limit budget low, waiting {delay:.1f}s")
+            time.sleep(delay)
+
+    def update(self, headers) -> None:
+        pause = 0.0
+        for kind, low in (('requests', self.low_requests), ('tokens', self.low_tokens)):
+            try:
+                remaining = int(headers.get(f'x-ratelimit-remaining-{kind}'))
+            except (TypeError, ValueError):
+                continue
+            if remaining < low:
+                pause = max(pause, _parse_reset(headers.get(f'x-ratelimit-reset-{kind}')))
+        if pause:
+            with self._lock:
+                self._open_at = max(self._open_at, time.monotonic() + pause)
+
 
 @dataclass
 class QualifiedLead:
@@ -87,9 +164,66 @@ frustration with current solutions, requests for recommendations.
 
 Respond ONLY with valid JSON, no markdown formatting."""
 
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini"):
-        self.client = OpenAI(api_key=api_key)
+    # Sent first and byte-identical on every call so OpenAI's automatic
+    # prompt caching can reuse the prefix; never interpolate into it
+    SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+    # Reply budget for one qualification (~8 short JSON fields, usually under
+    # 200 tokens); a smaller reservation lowers latency. Callers generating
+    # longer text pass their own max_tokens.
+    max_tokens = int(os.getenv('QUALIFIER_MAX_TOKENS', '220'))
+
+    def __init__(self, api_key: str, model: str = "gpt-4o-mini", semantic_cache: Optional[SemanticCache] = None,
+                 prompt_cache: Optional[PromptCache] = None):
+        self.client = OpenAI(
+            api_key=api_key,
+            max_retries=0,
+            http_client=DefaultHttpxClient(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+        )
         self.model = model
+        self.rate_limit = RateLimitGate()
+        # Near-duplicate posts reuse an earlier qualification (opt-in: a cache
+        # hit returns the matched post's summary and pain points too)
+        if semantic_cache is None and os.getenv('QUALIFIER_SEMANTIC_CACHE') == '1':
+            if semantic_cache_available():
+                semantic_cache = SemanticCache()
+            else:
+                logger.warning("QUALIFIER_SEMANTIC_CACHE=1 but sentence-transformers is not installed")
+        self.semantic_cache = semantic_cache
+        # Exact-match completion cache; opened on first use, PROMPT_CACHE=0 disables it
+        self._prompt_cache = prompt_cache
+        self._prompt_cache_lock = threading.Lock()
+    
+    @property
+    def prompt_cache(self) -> Optional[PromptCache]:
+        if self._prompt_cache is None and os.getenv('PROMPT_CACHE', '1') != '0':
+            with self._prompt_cache_lock:
+                if self._prompt_cache is None:
+                    self._prompt_cache = PromptCache()
+        return self._prompt_cache
+    
+    def _call_openai(self, messages: List[Dict], cache_enabled: Optional[bool] = None,
+                     max_tokens: Optional[int] = None) -> str:
+        """
+        Call OpenAI, answering repeated identical requests from the prompt
+        cache. cache_enabled defaults to True for low-temperature calls.
+        """
+        max_tokens = max_tokens or self.max_tokens
+        if cache_enabled is None:
+            cache_enabled = TEMPERATURE <= PROMPT_CACHE_MAX_TEMPERATURE
+        cache = self.prompt_cache if cache_enabled else None
+        if cache is None:
+            return self._request_completion(messages, max_tokens)[0]
+        
+        key = prompt_key(self.model, messages, temperature=TEMPERATURE, max_tokens=max_tokens)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        text, finish_reason = self._request_completion(messages, max_tokens)
+        # A reply cut off at max_tokens would fail to parse on every rerun
+        if finish_reason == 'stop':
+            cache.put(key, text)
+        return text
     
     @retry(
         retry=retry_if_exception_type((RateLimitError, APIConnectionError, APIError)),
@@ -97,29 +231,25 @@ Respond ONLY with valid JSON, no markdown formatting."""
         wait=wait_exponential(multiplier=1, min=2, max=30),
         before_sleep=before_sleep_log(logger, logging.WARNING)
     )
-    def _call_openai(self, messages: List[Dict]) -> str:
-        """Call OpenAI API with retry logic for resilience"""
-        response = self.client.chat.completions.create(
+    def _request_completion(self, messages: List[Dict], max_tokens: int) -> Tuple[str, str]:
+        """
+        Call OpenAI API with retry logic for resilience.
+        Returns (text, finish_reason).
+        """
+        self.rate_limit.wait()
+        raw = self.client.chat.completions.with_raw_response.create(
             model=self.model,
             messages=messages,
-            temperature=0.3,
-            max_tokens=500
+            temperature=TEMPERATURE,
+            max_tokens=max_tokens,
+            # Route calls sharing a system prompt to the same prompt cache
+            extra_body={"prompt_cache_key": _prompt_cache_routing_key(messages)}
         )
-        return response.choices[0].message.content.strip()
+        self.rate_limit.update(raw.headers)
+        choice = raw.parse().choices[0]
+        return choice.message.content.strip(), choice.finish_reason
     
-    def qualify_lead(self, lead_data: Dict) -> Optional[QualifiedLead]:
-        """Qualify a single lead using AI"""
-        
-        prompt = f"""Analyze this lead and provide qualification scores:
-
-Platform: {lead_data['platform']}
-Username: {lead_data['username']}
-Title: {lead_data['title']}
-Content: {lead_data['content'][:1500]}
-Post URL: {lead_data['post_url']}
-
-Respond with JSON in this exact format:
-{{
+    RESULT_FORMAT = """{
     "score": <1-10>,
     "urgency": <1-10>,
     "budget_indicator": "<low|medium|high|enterprise>",
@@ -128,40 +258,72 @@ Respond with JSON in this exact format:
     "problem_summary": "<one sentence summary>",
     "pain_points": ["<point 1>", "<point 2>"],
     "recommended_approach": "<how to approach this lead>"
-}}"""
+}"""
+
+    @staticmethod
+    def _lead_block(lead_data: Dict) -> str:
+        return f"""Platform: {lead_data['platform']}
+Username: {lead_data['username']}
+Title: {lead_data['title']}
+Content: {lead_data['content'][:1500]}
+Post URL: {lead_data['post_url']}"""
+
+    @staticmethod
+    def _cache_text(lead_data: Dict) -> str:
+        return f"{lead_data['title']}\n{lead_data['content'][:1500]}"
+
+    @staticmethod
+    def _parse_json(result_text: str):
+        # Clean up any markdown formatting
+        if result_text.startswith('```'):
+            result_text = result_text.split('```')[1]
+            if result_text.startswith('json'):
+                result_text = result_text[4:]
+            result_text = result_text.strip()
+        return json.loads(result_text)
+
+    @staticmethod
+    def _build_qualified(lead_data: Dict, result: Dict) -> QualifiedLead:
+        return QualifiedLead(
+            username=lead_data['username'],
+            platform=lead_data['platform'],
+            title=lead_data['title'],
+            content=lead_data['content'],
+            post_url=lead_data['post_url'],
+            profile_url=lead_data.get('profile_url'),
+            email=lead_data.get('email'),
+            score=min(10, max(1, result.get('score', 5))),
+            urgency=min(10, max(1, result.get('urgency', 5))),
+            budget_indicator=result.get('budget_indicator', 'medium'),
+            market_size=result.get('market_size', 'small'),
+            willingness_to_pay=min(10, max(1, result.get('willingness_to_pay', 5))),
+            problem_summary=result.get('problem_summary', ''),
+            pain_points=result.get('pain_points', []),
+            recommended_approach=result.get('recommended_approach', '')
+        )
+
+    def qualify_lead(self, lead_data: Dict) -> Optional[QualifiedLead]:
+        """Qualify a single lead using AI"""
+        
+        prompt = f"""Analyze this lead and provide qualification scores:
+
+{self._lead_block(lead_data)}
+
+Respond with JSON in this exact format:
+{self.RESULT_FORMAT}"""
 
         try:
-            result_text = self._call_openai([
-                {"role": "system", "content": self.SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ])
-            
-            # Clean up any markdown formatting
-            if result_text.startswith('```'):
-                result_text = result_text.split('```')[1]
-                if result_text.startswith('json'):
-                    result_text = result_text[4:]
-                result_text = result_text.strip()
+            cache_text = self._cache_text(lead_data)
+            result = self.semantic_cache.lookup(cache_text) if self.semantic_cache is not None else None
+            if result is None:
+                result = self._parse_json(self._call_openai([
+                    self.SYSTEM_MESSAGE,
+                    {"role": "user", "content": prompt}
+                ]))
+                if self.semantic_cache is not None:
+                    self.semantic_cache.add(cache_text, result)
             
-            result = json.loads(result_text)
-            
-            return QualifiedLead(
-                username=lead_data['username'],
-                platform=lead_data['platform'],
-                title=lead_data['title'],
-                content=lead_data['content'],
-                post_url=lead_data['post_url'],
-                profile_url=lead_data.get('profile_url'),
-                email=lead_data.get('email'),
-                score=min(10, max(1, result.get('score', 5))),
-                urgency=min(10, max(1, result.get('urgency', 5))),
-                budget_indicator=result.get('budget_indicator', 'medium'),
-                market_size=result.get('market_size', 'small'),
-                willingness_to_pay=min(10, max(1, result.get('willingness_to_pay', 5))),
-                problem_summary=result.get('problem_summary', ''),
-                pain_points=result.get('pain_points', []),
-                recommended_approach=result.get('recommended_approach', '')
-            )
+            return self._build_qualified(lead_data, result)
             
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse AI response: {e}")
@@ -170,20 +332,78 @@ Respond with JSON in this exact format:
             logger.error(f"Error qualifying lead: {e}")
             return None
     
+    def qualify_lead_batch(self, leads: List[Dict]) -> List[Optional[QualifiedLead]]:
+        """
+        Qualify several leads with one request: the system prompt is sent
+        once and the model returns a JSON array of scores. Results come back
+        in input order; leads missing from a malformed reply are retried one
+        by one with qualify_lead.
+        """
+        results: List[Optional[Dict]] = [None] * len(leads)
+        if self.semantic_cache is not None:
+            results = [self.semantic_cache.lookup(self._cache_text(lead)) for lead in leads]
+        pending = [i for i, result in enumerate(results) if result is None]
+        
+        if len(pending) > 1:
+            blocks = "\n\n".join(f"[{n}]\n{self._lead_block(leads[i])}" for n, i in enumerate(pending, 1))
+            prompt = f"""Analyze each of these {len(pending)} leads and provide qualification scores:
+
+{blocks}
+
+Respond with JSON in this exact format, one entry per lead in the same order:
+{{"results": [{{"index": <lead number>, ...}}, ...]}}
+where each entry has the lead's number plus these fields:
+{self.RESULT_FORMAT}"""
+            try:
+                reply = self._parse_json(self._call_openai([
+                    self.SYSTEM_MESSAGE,
+                    {"role": "user", "content": prompt}
+                ], max_tokens=BATCH_MAX_TOKENS_PER_LEAD * len(pending)))
+                entries = reply.get('results', []) if isinstance(reply, dict) else reply
+                for position, entry in enumerate(entries):
+                    if not isinstance(entry, dict):
+                        continue
+                    n = entry.get('index', position + 1)
+                    if isinstance(n, int) and 1 <= n <= len(pending) and results[pending[n - 1]] is None:
+                        i = pending[n - 1]
+                        results[i] = entry
+                        if self.semantic_cache is not None:
+                            self.semantic_cache.add(self._cache_text(leads[i]), entry)
+            except Exception as e:
+                logger.warning(f"Batch qualification failed, falling back to single leads: {e}")
+        
+        qualified = []
+        for lead_data, result in zip(leads, results):
+            if result is None:
+                qualified.append(self.qualify_lead(lead_data))
+                continue
+            try:
+                qualified.append(self._build_qualified(lead_data, result))
+            except Exception as e:
+                logger.error(f"Error qualifying lead: {e}")
+                qualified.append(None)
+        return qualified
+    
     def qualify_batch(
         self, 
         leads: List[Dict], 
         min_score: int = 5,
-        max_to_process: int = 100
+        max_to_process: int = 100,
+        batch_size: int = QUALIFY_BATCH_SIZE
     ) -> List[QualifiedLead]:
         """Qualify a batch of leads and filter by minimum score"""
         
         qualified = []
+        batch = leads[:max_to_process]
+        chunks = [batch[i:i + batch_size] for i in range(0, len(batch), batch_size)]
         
-        for i, lead_data in enumerate(leads[:max_to_process]):
-            logger.info(f"Qualifying lead {i+1}/{min(len(leads), max_to_process)}")
-            
-            qualified_lead = self.qualify_lead(lead_data)
+        # batch_size leads per request, requests overlapping; results are
+        # logged in input order
+        with ThreadPoolExecutor(max_workers=min(len(chunks), QUALIFY_CONCURRENCY) or 1) as pool:
+            results = [lead for chunk in pool.map(self.qualify_lead_batch, chunks) for lead in chunk]
+        
+        for i, qualified_lead in enumerate(results):
+            logger.info(f"Lead {i+1}/{len(batch)}")
             
             if qualified_lead and qualified_lead.score >= min_score:
                 qualified.append(qualified_lead)
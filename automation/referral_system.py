@@ -70,9 +70,13 @@ class ReferralEngine:
     
     def generate_referral_code(self, user_id: int, user_email: str) -> str:
         """Generate unique referral code for a user"""
-        secret = os.getenv('SECRET_KEY', 'default')
-        base = f"{user_id}:{user_email}:{secret}"
-        code_hash = hashlib.sha256(base.encode()).hexdigest()[:8].upper()
+        secret = os.getenv('SECRET_KEY', 'default').encode()
+        if len(secret) > hashlib.blake2b.MAX_KEY_SIZE:
+            secret = hashlib.blake2b(secret).digest()
+        # Keyed BLAKE2b with a native 4-byte digest: 8 hex chars, and not
+        # forgeable from user_id:email without SECRET_KEY
+        base = f"{user_id}:{user_email}"
+        code_hash = hashlib.blake2b(base.encode(), digest_size=4, key=secret).hexdigest().upper()
         return f"LF-{code_hash}"
     
     def generate_referral_link(self, code: str, base_url: str = None) -> str:
@@ -0,0 +1,124 @@
+"""
+Lead Finder AI - Semantic Cache
+Reuses LLM results for near-duplicate texts (cross-posts, reposts, templated
+"looking for an agency" threads) via nearest-neighbour search over
+sentence-transformer embeddings. Persisted to SQLite so hits survive
+pipeline reruns.
+"""
+import os
+import json
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import faiss
+except ImportError:  # optional: a numpy dot product does the same search
+    faiss = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv('SEMANTIC_CACHE_MODEL', 'all-MiniLM-L6-v2')
+DEFAULT_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.92'))
+DEFAULT_PATH = os.getenv(
+    'SEMANTIC_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'semantic_cache.sqlite')
+)
+
+
+def is_available() -> bool:
+    """True if numpy and sentence-transformers are installed"""
+    return np is not None and SentenceTransformer is not None
+
+
+class SemanticCache:
+    """
+    Maps texts to JSON-serialisable results. lookup() returns the result
+    stored for the most similar text if its cosine similarity is at least
+    `threshold`, otherwise None.
+
+    `encoder` is anything with a sentence-transformers style
+    encode(texts) -> 2D array; by default `model_name` is loaded.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, threshold: float = DEFAULT_THRESHOLD,
+                 model_name: str = DEFAULT_MODEL, encoder=None):
+        if np is None:
+            raise RuntimeError("SemanticCache requires numpy")
+        if encoder is None:
+            if SentenceTransformer is None:
+                raise RuntimeError("SemanticCache requires sentence-transformers")
+            encoder = SentenceTransformer(model_name)
+        self.encoder = encoder
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._results = []
+        self._matrix = None  # L2-normalised embeddings, one row per result
+        self._faiss = None
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS semantic_cache (embedding BLOB, result TEXT)")
+        self._db.commit()
+        for blob, result in self._db.execute("SELECT embedding, result FROM semantic_cache ORDER BY rowid"):
+            self._append(np.frombuffer(blob, dtype=np.float32), json.loads(result))
+
+    def __len__(self):
+        return len(self._results)
+
+    def _embed(self, text: str):
+        vector = np.asarray(self.encoder.encode([text])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _append(self, vector, result: Dict) -> None:
+        row = vector.reshape(1, -1)
+        self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+        if faiss is not None:
+            if self._faiss is None:
+                self._faiss = faiss.IndexFlatIP(row.shape[1])
+            self._faiss.add(row)
+        self._results.append(result)
+
+    def _nearest(self, vector):
+        """(similarity, index) of the closest stored embedding"""
+        if self._faiss is not None:
+            scores, indexes = self._faiss.search(vector.reshape(1, -1), 1)
+            return float(scores[0][0]), int(indexes[0][0])
+        scores = self._matrix @ vector
+        best = int(np.argmax(scores))
+        return float(scores[best]), best
+
+    def lookup(self, text: str) -> Optional[Dict]:
+        """Cached result for the most similar text, or None below the threshold"""
+        vector = self._embed(text)
+        with self._lock:
+            if not self._results:
+                return None
+            similarity, index = self._nearest(vector)
+            if similarity < self.threshold:
+                return None
+            return self._results[index]
+
+    def add(self, text: str, result: Dict) -> None:
+        """Store a result for text"""
+        vector = self._embed(text)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO semantic_cache (embedding, result) VALUES (?, ?)",
+                (vector.tobytes(), json.dumps(result))
+            )
+            self._db.commit()
+            self._append(vector, result)
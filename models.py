@@ -1,7 +1,9 @@
 """
 Lead Finder AI - Database Models
 """
+import os
 from datetime import datetime
+from cryptography.fernet import Fernet
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_login import UserMixin
@@ -53,6 +55,7 @@ class User(db.Model, UserMixin):
     # Relationships
     leads = db.relationship('Lead', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     transactions = db.relationship('Transaction', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    smtp_config = db.relationship('UserSMTPConfig', uselist=False, lazy='select')
     
     def set_password(self, password):
         self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
@@ -291,8 +294,6 @@ class UserSMTPConfig(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def get_password(self):
-        from cryptography.fernet import Fernet
-        import os
         key = os.getenv('ENCRYPTION_KEY')
         if not key:
             raise ValueError("ENCRYPTION_KEY not set")
@@ -300,8 +301,6 @@ class UserSMTPConfig(db.Model):
         return f.decrypt(self.smtp_password.encode()).decode()
 
     def set_password(self, password):
-        from cryptography.fernet import Fernet
-        import os
         key = os.getenv('ENCRYPTION_KEY')
         if not key:
              raise ValueError("ENCRYPTION_KEY not set")
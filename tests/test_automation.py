@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from flask import Flask
 from models import db, Lead, User
 from automation.follow_up_engine import FollowUpEngine
+from automation.outreach_agent import OutreachAgent
 from app import create_app
 
 class TestAutomation(unittest.TestCase):
@@ -62,6 +63,49 @@ class TestAutomation(unittest.TestCase):
         should, reason = engine.should_continue_sequence(lead.id)
         self.assertFalse(should)
         
+    def test_filter_continuable(self):
+        """Batch continuation check matches the single-lead one"""
+        leads = [
+            Lead(user_id=self.user.id, email='a@example.com', status='new', title='A'),
+            Lead(user_id=self.user.id, email='b@example.com', status='new', title='B', email_replied=True),
+            Lead(user_id=self.user.id, email='c@example.com', status='converted', title='C'),
+            Lead(user_id=self.user.id, email='d@example.com', status=None, title='D', email_replied=None),
+        ]
+        db.session.add_all(leads)
+        db.session.commit()
+        
+        engine = FollowUpEngine()
+        ids = [lead.id for lead in leads] + [9999]
+        expected = {i for i in ids if engine.should_continue_sequence(i)[0]}
+        self.assertEqual(engine.filter_continuable(ids), expected)
+        self.assertEqual(expected, {leads[0].id, leads[3].id})
+        
+    def test_filter_sendable(self):
+        """Invalid, already contacted and in-batch duplicate addresses are archived"""
+        other = User(email='other@example.com', name='Other User')
+        other.set_password('password')
+        db.session.add(other)
+        db.session.add_all([
+            Lead(user_id=self.user.id, email='Sent@Example.com ', status='contacted', title='Old',
+                 email_sent_at=datetime.utcnow()),
+            Lead(user_id=other.id, email='fresh@example.com', status='contacted', title='Other user',
+                 email_sent_at=datetime.utcnow()),
+        ])
+        candidates = [
+            Lead(user_id=self.user.id, email='not-an-email', status='new', title='Invalid'),
+            Lead(user_id=self.user.id, email=' sent@example.com', status='new', title='Contacted'),
+            Lead(user_id=self.user.id, email='Fresh@Example.com', status='new', title='Fresh'),
+            Lead(user_id=self.user.id, email='fresh@example.com ', status='new', title='Duplicate'),
+            Lead(user_id=self.user.id, email='new@example.com', status='new', title='New'),
+        ]
+        db.session.add_all(candidates)
+        db.session.commit()
+        
+        sendable = OutreachAgent(self.app_context)._filter_sendable(candidates)
+        self.assertEqual([lead.title for lead in sendable], ['Fresh', 'New'])
+        self.assertEqual([lead.status for lead in candidates],
+                         ['archived', 'archived', 'new', 'archived', 'new'])
+        
     def test_app_structure(self):
         """Verify blueprints are registered"""
         self.assertIn('dashboard', self.app.blueprints)
@@ -0,0 +1,71 @@
+import re
+import unittest
+from urllib.parse import urlparse, parse_qs
+
+from automation.email_tracking import EmailTracker, TrackingAnalytics
+
+
+class TestEmailTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = EmailTracker('https://app.example.com')
+
+    def test_pixel_injected_before_body(self):
+        html = self.tracker.inject_tracking_into_html('<html><BODY><p>Hi</p></BODY></html>', 7, 'tid123')
+        self.assertRegex(html, r'<img src="https://app.example.com/track/open/tid123.gif"[^>]*></BODY></html>$')
+
+    def test_pixel_appended_without_body(self):
+        html = self.tracker.inject_tracking_into_html('<p>Hi</p>', 7, 'tid123')
+        self.assertTrue(html.startswith('<p>Hi</p><img src="https://app.example.com/track/open/tid123.gif"'))
+
+    def test_pixel_before_last_body_without_links(self):
+        source = '<html><body><p>Hi</p></body></html>'
+        html = self.tracker.inject_tracking_into_html(source, 7, 'tid123')
+        self.assertNotIn('href=', html)
+        self.assertRegex(html, r'^<html><body><p>Hi</p><img src="[^"]+tid123.gif"[^>]*></body></html>$')
+
+    def test_tracking_id_format(self):
+        first = self.tracker.generate_tracking_id(7)
+        self.assertRegex(first, r'^[0-9a-f]{24}$')
+        self.assertNotEqual(first, self.tracker.generate_tracking_id(7))
+
+    def test_links_wrapped(self):
+        original = 'https://calendly.com/me?a=1&b=2'
+        html = self.tracker.inject_tracking_into_html(
+            f'<a href="{original}">book</a> <a href=\'mailto:me@x.com\'>mail</a> <a href="#top">top</a>',
+            7, 'tid123'
+        )
+        tracked = re.search(r'href="([^"]+)">book', html).group(1)
+        parsed = urlparse(tracked)
+        self.assertEqual(parsed.path, '/track/click/tid123')
+        params = parse_qs(parsed.query)
+        self.assertEqual(params['url'], [original])
+        self.assertEqual(params['lid'], ['7'])
+        self.assertIn("href='mailto:me@x.com'", html)
+        self.assertIn('href="#top"', html)
+
+    def test_text_urls_wrapped(self):
+        text = self.tracker.inject_tracking_into_text('Book here: https://calendly.com/me thanks', 7, 'tid123')
+        self.assertRegex(text, r'^Book here: https://app.example.com/track/click/tid123\?url=\S+ thanks$')
+
+
+class TestTrackingAnalytics(unittest.TestCase):
+    def test_benchmark_status_boundaries(self):
+        cases = [(10, 1, 'below', 'below'), (15, 2, 'below', 'below'), (15.5, 2.5, 'at', 'at'),
+                 (20, 3.5, 'at', 'at'), (22.5, 4.2, 'above', 'above')]
+        for open_rate, click_rate, open_status, click_status in cases:
+            result = TrackingAnalytics.get_benchmark_comparison(open_rate, click_rate)
+            self.assertEqual(result['open_rate']['status'], open_status)
+            self.assertEqual(result['click_rate']['status'], click_status)
+
+    def test_bulk_matches_scalar(self):
+        open_rates = [0, 15, 15.01, 20, 20.01, 60]
+        click_rates = [0, 2, 2.01, 3.5, 3.51, 9]
+        bulk = TrackingAnalytics.get_benchmark_comparison_bulk(open_rates, click_rates)
+        for i, (open_rate, click_rate) in enumerate(zip(open_rates, click_rates)):
+            scalar = TrackingAnalytics.get_benchmark_comparison(open_rate, click_rate)
+            self.assertEqual(bulk['open_rate']['status'][i], scalar['open_rate']['status'])
+            self.assertEqual(bulk['click_rate']['status'][i], scalar['click_rate']['status'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from automation import email_validator
+from automation.email_validator import EmailValidator
+
+
+class TestSyntax(unittest.TestCase):
+    def test_validate_syntax(self):
+        validator = EmailValidator()
+        for email in ['a@b.com', 'jane.doe+x@sub.example.co', "o'k@x.io"]:
+            self.assertTrue(validator.validate_syntax(email), email)
+        for email in ['', 'invalid-email', 'a@@b.com', 'a..b@x.com', 'a@b..com', '@x.com', 'a@',
+                      'a@-b.com', 'x' * 65 + '@b.com', 'a@b.com\n', 'a b@x.com']:
+            self.assertFalse(validator.validate_syntax(email), email)
+
+
+class TestMXCache(unittest.TestCase):
+    def setUp(self):
+        email_validator._mx_cache.clear()
+        self.validator = EmailValidator()
+
+    def tearDown(self):
+        email_validator._mx_cache.clear()
+
+    def test_hit_skips_dns(self):
+        with mock.patch.object(self.validator, '_lookup_mx', return_value=(True, 'MX: mx.example.com.')) as lookup:
+            self.assertEqual(self.validator.check_mx_record('example.com'), (True, 'MX: mx.example.com.'))
+            self.assertEqual(EmailValidator().check_mx_record('example.com'), (True, 'MX: mx.example.com.'))
+        lookup.assert_called_once_with('example.com')
+
+    def test_negative_entries_expire_sooner(self):
+        with mock.patch.object(self.validator, '_lookup_mx', return_value=(False, 'Domain does not exist')):
+            self.validator.check_mx_record('gone.example')
+        with mock.patch.object(self.validator, '_lookup_mx', return_value=(True, 'MX: mx.example.com.')):
+            self.validator.check_mx_record('example.com')
+        ttl = {d: exp for d, (_, _, exp) in email_validator._mx_cache.items()}
+        self.assertLess(ttl['gone.example'], ttl['example.com'])
+
+    def test_concurrent_misses_share_one_lookup(self):
+        calls = []
+
+        def lookup(domain):
+            calls.append(domain)
+            time.sleep(0.1)
+            return False, 'DNS timeout'
+
+        results = []
+        with mock.patch.object(EmailValidator, '_lookup_mx', side_effect=lookup, autospec=False):
+            threads = [threading.Thread(target=lambda: results.append(EmailValidator().check_mx_record('slow.example')))
+                       for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(calls, ['slow.example'])
+        self.assertEqual(results, [(False, 'DNS timeout')] * 5)
+        self.assertEqual(email_validator._mx_inflight, {})
+
+    def test_transient_errors_not_cached(self):
+        with mock.patch.object(self.validator, '_lookup_mx', return_value=(False, 'DNS timeout')):
+            self.validator.check_mx_record('slow.example')
+        self.assertNotIn('slow.example', email_validator._mx_cache)
+
+
+class TestValidateBatch(unittest.TestCase):
+    def setUp(self):
+        email_validator._mx_cache.clear()
+
+    def tearDown(self):
+        email_validator._mx_cache.clear()
+
+    def test_batch_matches_single(self):
+        validator = EmailValidator()
+
+        async def resolve(domain, semaphore):
+            return (domain != 'gone.example', 'Domain does not exist' if domain == 'gone.example' else 'MX: mx.')
+
+        emails = ['Jane@Example.com', 'info@example.com', 'x@mailinator.com', 'bad', 'a@gone.example', '']
+        with mock.patch.object(validator, '_resolve_mx', side_effect=resolve):
+            batch = validator.validate_batch(emails)
+        # Every domain is now cached, so single validation reads the same MX verdicts
+        with mock.patch.object(validator, '_lookup_mx', side_effect=AssertionError('DNS not expected')):
+            single = [validator.validate(e) for e in emails]
+        self.assertEqual([r.to_dict() for r in batch], [r.to_dict() for r in single])
+        self.assertEqual(batch[0].score, 100)
+        self.assertFalse(batch[3].is_valid)
+        self.assertFalse(batch[4].has_mx_record)
+
+
+    def test_disposable_and_bogus_tld_skip_dns(self):
+        validator = EmailValidator()
+        with mock.patch.object(validator, '_lookup_mx', side_effect=AssertionError('DNS not expected')):
+            disposable = validator.validate('info@mailinator.com')
+            bogus = validator.validate('a@example.' + 'x' * 25)
+        self.assertEqual((disposable.has_mx_record, disposable.is_deliverable), (False, False))
+        self.assertEqual(disposable.reason, 'Disposable email; Role-based address')
+        self.assertEqual(bogus.reason, 'Invalid top-level domain')
+
+    def test_threaded_batch_matches_batch(self):
+        validator = EmailValidator()
+        emails = ['Jane@Example.com', 'x@mailinator.com', 'bad', 'a@gone.example']
+
+        def lookup(domain):
+            return (domain != 'gone.example', 'Domain does not exist' if domain == 'gone.example' else 'MX: mx.')
+
+        with mock.patch.object(validator, '_lookup_mx', side_effect=lookup):
+            threaded = validator.validate_batch_threaded(emails)
+        with mock.patch.object(validator, '_lookup_mx', side_effect=AssertionError('DNS not expected')):
+            batch = validator.validate_batch(emails)
+        self.assertEqual([r.to_dict() for r in threaded], [r.to_dict() for r in batch])
+
+
+if __name__ == '__main__':
+    unittest.main()
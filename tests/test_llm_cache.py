@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ViralVortex_Standalone'))
+
+from llm_cache import CachedLLM
+
+
+class _WordEmbeddings:
+    """Bag-of-words vectors over a fixed vocabulary, standing in for text-embedding-3-small"""
+    VOCAB = ['viral', 'post', 'about', 'ai', 'agents', 'saas', 'coffee', 'shops', 'pricing', 'rewrite']
+
+    def __init__(self):
+        self.inputs = []
+
+    def create(self, model, input):
+        self.inputs.append(input)
+        words = input.lower().replace(':', ' ').split()
+        vector = [float(words.count(word)) for word in self.VOCAB]
+        return SimpleNamespace(data=[SimpleNamespace(embedding=vector)])
+
+
+def _messages(system, topic):
+    return [{"role": "system", "content": system}, {"role": "user", "content": f"Generate a viral post about: {topic}"}]
+
+
+class TestCachedLLM(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.embeddings = _WordEmbeddings()
+        client = SimpleNamespace(embeddings=self.embeddings)
+        self.cache = CachedLLM(client, path=os.path.join(self.tmp.name, 'cache.sqlite'), threshold=0.97)
+        # Long shared instruction block: with it in the embedding every draft looked alike
+        self.system = "You are a master viral marketer. " + "viral post rewrite " * 50
+
+    def tearDown(self):
+        self.cache._db.close()
+        self.tmp.cleanup()
+
+    def test_different_topics_do_not_collide(self):
+        first = self.cache.get_or_compute("draft", "gpt-4o", _messages(self.system, "AI agents"), lambda: "agents draft")
+        second = self.cache.get_or_compute("draft", "gpt-4o", _messages(self.system, "coffee shops pricing"),
+                                           lambda: "coffee draft")
+        self.assertEqual((first, second), ("agents draft", "coffee draft"))
+        # Only the user content is embedded, never the system prompt
+        self.assertTrue(all(self.system not in text for text in self.embeddings.inputs))
+
+    def test_same_topic_with_other_system_prompt_misses(self):
+        self.cache.get_or_compute("draft", "gpt-4o", _messages("Generate in Spanish.", "AI agents"), lambda: "es")
+        result = self.cache.get_or_compute("draft", "gpt-4o", _messages("Generate in English.", "AI agents"),
+                                           lambda: "en")
+        self.assertEqual(result, "en")
+
+    def test_near_duplicate_hits_within_partition(self):
+        self.cache.get_or_compute("draft", "gpt-4o", _messages(self.system, "AI agents"), lambda: "agents draft")
+        result = self.cache.get_or_compute("draft", "gpt-4o", _messages(self.system, "ai AGENTS"),
+                                           lambda: self.fail("expected a cache hit"))
+        self.assertEqual(result, "agents draft")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import unittest
+from unittest import mock
+
+from automation.qualifier import LeadQualifier, RateLimitGate, _parse_reset
+
+
+def _lead(n):
+    return {
+        'platform': 'reddit',
+        'username': f'user{n}',
+        'title': f'Need help with project {n}',
+        'content': f'Looking for an agency for project {n}',
+        'post_url': f'https://reddit.com/r/test/{n}',
+    }
+
+
+def _scores(score, **extra):
+    return {'score': score, 'urgency': score, 'budget_indicator': 'high', 'market_size': 'small',
+            'willingness_to_pay': score, 'problem_summary': 'summary', 'pain_points': [],
+            'recommended_approach': 'approach', **extra}
+
+
+class TestQualifyLeadBatch(unittest.TestCase):
+    def setUp(self):
+        self.qualifier = LeadQualifier(api_key='test')
+        self.single_calls = []
+
+    def _stub_openai(self, batch_reply):
+        """Batch requests get batch_reply; single-lead fallbacks score the lead by its number"""
+        def call(messages, cache_enabled=None, max_tokens=None):
+            prompt = messages[-1]['content']
+            if prompt.startswith('Analyze each'):
+                return batch_reply
+            n = int(prompt.split('Username: user')[1].split('\n')[0])
+            self.single_calls.append(n)
+            return json.dumps(_scores(n))
+        self.qualifier._call_openai = call
+
+    def test_reordered_reply_is_mapped_by_index(self):
+        self._stub_openai(json.dumps({'results': [
+            _scores(3, index=3), _scores(1, index=1), _scores(2, index=2)
+        ]}))
+        results = self.qualifier.qualify_lead_batch([_lead(1), _lead(2), _lead(3)])
+        self.assertEqual([r.username for r in results], ['user1', 'user2', 'user3'])
+        self.assertEqual([r.score for r in results], [1, 2, 3])
+        self.assertEqual(self.single_calls, [])
+
+    def test_missing_lead_falls_back_to_single_call(self):
+        self._stub_openai(json.dumps({'results': [_scores(1, index=1), _scores(3, index=3)]}))
+        results = self.qualifier.qualify_lead_batch([_lead(1), _lead(2), _lead(3)])
+        self.assertEqual([r.score for r in results], [1, 2, 3])
+        self.assertEqual(self.single_calls, [2])
+
+    def test_unparseable_reply_falls_back_for_every_lead(self):
+        self._stub_openai('Sorry, I cannot help with that.')
+        results = self.qualifier.qualify_lead_batch([_lead(1), _lead(2)])
+        self.assertEqual([r.score for r in results], [1, 2])
+        self.assertEqual(self.single_calls, [1, 2])
+
+
+class TestRateLimitGate(unittest.TestCase):
+    def test_parse_reset(self):
+        self.assertEqual(_parse_reset('6m0s'), 360)
+        self.assertEqual(_parse_reset('250ms'), 0.25)
+        self.assertEqual(_parse_reset('1.5s'), 1.5)
+        self.assertEqual(_parse_reset(None), 0)
+
+    @mock.patch('automation.qualifier.time.sleep')
+    def test_pauses_until_reset_when_budget_low(self, sleep):
+        gate = RateLimitGate(low_requests=2, low_tokens=4000)
+        gate.update({'x-ratelimit-remaining-requests': '1', 'x-ratelimit-reset-requests': '6m0s',
+                     'x-ratelimit-remaining-tokens': '90000', 'x-ratelimit-reset-tokens': '250ms'})
+        gate.wait()
+        sleep.assert_called_once()
+        self.assertAlmostEqual(sleep.call_args[0][0], 360, delta=1)
+
+    @mock.patch('automation.qualifier.time.sleep')
+    def test_no_pause_with_budget_left(self, sleep):
+        gate = RateLimitGate(low_requests=2, low_tokens=4000)
+        gate.update({'x-ratelimit-remaining-requests': '50', 'x-ratelimit-reset-requests': '6m0s',
+                     'x-ratelimit-remaining-tokens': '90000', 'x-ratelimit-reset-tokens': '250ms'})
+        gate.wait()
+        sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from automation import semantic_cache
+from automation.semantic_cache import SemanticCache
+
+
+class _WordEncoder:
+    """Bag-of-words vectors over a fixed vocabulary, standing in for MiniLM"""
+    VOCAB = ['need', 'marketing', 'agency', 'help', 'developer', 'website', 'fix']
+
+    def encode(self, texts):
+        return [[text.lower().split().count(word) for word in self.VOCAB] for text in texts]
+
+
+@unittest.skipIf(semantic_cache.np is None, "numpy not installed")
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticCache(path=':memory:', threshold=0.9, encoder=_WordEncoder())
+
+    def test_near_duplicate_hits(self):
+        self.assertIsNone(self.cache.lookup('need marketing agency help'))
+        self.cache.add('need marketing agency help', {'score': 8})
+        self.assertEqual(self.cache.lookup('Need marketing agency help please'), {'score': 8})
+
+    def test_dissimilar_misses(self):
+        self.cache.add('need marketing agency help', {'score': 8})
+        self.cache.add('fix website developer', {'score': 3})
+        self.assertIsNone(self.cache.lookup('need developer help'))
+        self.assertEqual(self.cache.lookup('developer fix website'), {'score': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()